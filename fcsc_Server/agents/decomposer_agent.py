@@ -3,7 +3,7 @@ import time
 import openai
 import json
 import re
-from flotorch.sdk.llm import FlotorchLLM
+from utils.llm_client import get_llm_client
 
 class DecomposerAgent:
     """
@@ -25,11 +25,7 @@ class DecomposerAgent:
         """
         start_time = time.time()
         try:
-            client = FlotorchLLM(
-                model_id=os.getenv("FLOTORCH_MODEL"),
-                api_key=os.getenv("FLOTORCH_API_KEY"),
-                base_url=os.getenv("FLOTORCH_BASE_URL")
-            )
+            client = get_llm_client()
             # client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
             prompt = f"""
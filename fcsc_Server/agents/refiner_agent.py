@@ -3,7 +3,7 @@ import time
 import openai
 import json
 import sqlparse # For formatting the output SQL
-from flotorch.sdk.llm import FlotorchLLM
+from utils.llm_client import get_llm_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -29,11 +29,7 @@ class RefinerAgent:
         start_time = time.time()
         try:
             # client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            client = FlotorchLLM(
-                model_id=os.getenv("FLOTORCH_MODEL"),
-                api_key=os.getenv("FLOTORCH_API_KEY"),
-                base_url= os.getenv("FLOTORCH_BASE_URL")
-            )
+            client = get_llm_client()
 
             # Format decomposition nicely for the prompt if it's a dict
             if decomposition:
@@ -4,7 +4,7 @@ import os
 import time
 import openai
 import json
-from flotorch.sdk.llm import FlotorchLLM
+from utils.llm_client import get_llm_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -37,11 +37,7 @@ class SelectorAgent:
 
         try:
             # client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            client = FlotorchLLM(
-                model_id=os.getenv("FLOTORCH_MODEL"),
-                api_key=os.getenv("FLOTORCH_API_KEY"),
-                base_url=os.getenv("FLOTORCH_BASE_URL")
-            )
+            client = get_llm_client()
 
             prompt = f"""
                 # Smart Query Evaluator Prompt
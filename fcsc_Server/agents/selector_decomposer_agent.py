@@ -0,0 +1,138 @@
+import os
+import time
+import json
+import re
+from utils.llm_client import get_llm_client
+from dotenv import load_dotenv
+load_dotenv()
+
+class SelectorDecomposerAgent:
+    """
+    Agent that performs the Selector and Decomposer steps in a single LLM call: it decides whether
+    the query is answerable, whether it needs decomposition and, if so, returns the decomposition.
+    """
+    @staticmethod
+    def evaluate_and_decompose(query: str, schema_string: str) -> tuple[bool, str, bool, dict | str | None, float]:
+        """
+        Uses one LLM call to evaluate the query and decompose it when needed.
+
+        Args:
+            query (str): The user's natural language query.
+            schema_string (str): A string representation of the database schema.
+
+        Returns:
+            tuple[bool, str, bool, dict | str | None, float]: A tuple containing:
+                                     - bool: True if the query is answerable (is_answerable).
+                                     - str: An explanation or status message.
+                                     - bool: True if the query needs decomposition (needs_decomposition).
+                                     - dict | str | None: The decomposition (None if not needed or not returned).
+                                     - float: The time taken in seconds.
+        """
+        start_time = time.time()
+        is_answerable_flag = False
+        explanation_msg = "Selector/Decomposer evaluation pending."
+        needs_decompose_flag = False
+        decomposition = None
+
+        try:
+            client = get_llm_client()
+
+            prompt = f"""
+You are a practical query evaluator and expert SQL planner.
+
+## Database Schema:
+{schema_string}
+
+## User Query:
+"{query}"
+
+## Your Task:
+
+### 1. Is the query answerable? (Be GENEROUS)
+Answer "Yes" if any table or column matches or is conceptually related to the query and a developer
+could reasonably write SQL for it using the available tables. Answer "No" ONLY if the query asks for
+data that no table could possibly contain.
+
+### 2. Does it need decomposition? (Be PRACTICAL)
+Answer "Yes" if the query needs multiple SELECT statements or subqueries, joins across tables,
+different aggregations on different data, complex comparisons or trend analysis, or filters across
+different tables. Answer "No" for a simple SELECT, basic filtering or a single aggregation on one table.
+
+### 3. Decomposition (only when is_answerable is "Yes" AND need_decompose is "Yes", otherwise null)
+Return an object with these fields:
+- "tables_needed": tables relevant to the query, including tables needed for joins.
+- "columns_needed": columns required (with table qualifiers if needed).
+- "aggregations": list of {{"operation", "target_column", "alias"}}.
+- "filters_conditions": list of filters with column(s), operator and value(s).
+- "joins": list of {{"left_table", "right_table", "join_type", "on"}}.
+- "grouping": columns for GROUP BY.
+- "ordering": list of {{"column", "direction"}}.
+- "time_handling": "treat_each_year_separately", "sum_across_years" or "compare_years", plus "year_range" if applicable.
+- "column_transformation": "pivot_years_to_rows", "keep_columnar" or "aggregate_across_columns" if year columns need reshaping.
+- "explanation": 1–3 sentences on what the query asks for and how SQL answers it.
+Quote numeric column names (like "2015") and treat time ranges as inclusive unless stated otherwise.
+
+## Response Format:
+Return ONLY a valid JSON object — no markdown, comments, or extra text:
+
+{{
+  "is_answerable": "Yes" or "No",
+  "need_decompose": "Yes" or "No",
+  "decomposition": {{ ... }} or null
+}}
+"""
+
+            response = client.invoke(messages=[{"role":"user","content":prompt}])
+            answer = response.content
+            print(f"SelectorDecomposerAgent LLM raw response: {answer}") # for debugging/logging
+
+            try:
+                # Remove markdown code block formatting if present
+                json_match = re.search(r'```(?:json)?(.*?)```', answer, re.DOTALL)
+                result = json.loads(json_match.group(1).strip() if json_match else answer)
+
+                is_answerable_flag = str(result.get("is_answerable", "No")).strip().lower() == "yes"
+                needs_decompose_flag = str(result.get("need_decompose", "No")).strip().lower() == "yes"
+
+                if is_answerable_flag:
+                    explanation_msg = f"Query is considered answerable. Decomposition needed: {needs_decompose_flag}."
+                    if needs_decompose_flag:
+                        decomposition = result.get("decomposition")
+                else:
+                    explanation_msg = f"Query is considered NOT answerable. Decomposition needed: {needs_decompose_flag}."
+                    needs_decompose_flag = False
+
+            except (json.JSONDecodeError, AttributeError):
+                explanation_msg = f"Error: Failed to parse JSON from SelectorDecomposerAgent. Raw response: '{answer}'"
+                print(explanation_msg)
+
+        except Exception as e:
+            explanation_msg = f"Unexpected error in SelectorDecomposerAgent: {str(e)}"
+            print(explanation_msg)
+
+        time_taken = time.time() - start_time
+        return is_answerable_flag, explanation_msg, needs_decompose_flag, decomposition, time_taken
+
+# Example usage (for testing)
+if __name__ == '__main__':
+    dummy_schema = """
+    Database Schema:
+    Table: employees (
+      employee_id INTEGER,
+      name TEXT,
+      department TEXT,
+      salary REAL
+    );
+    Table: departments (
+      department_id INTEGER,
+      department_name TEXT
+    );
+    """
+    query = "Compare the average salary of each department with the company-wide average."
+
+    if os.getenv("FLOTORCH_API_KEY"):
+        answerable, explanation, needs_decomp, decomposition, duration = SelectorDecomposerAgent.evaluate_and_decompose(query, dummy_schema)
+        print(f"Answerable: {answerable}, Explanation: {explanation}, Needs Decomposition: {needs_decomp}, Time: {duration:.4f}s")
+        print(json.dumps(decomposition, indent=2))
+    else:
+        print("Flotorch API key not found. Cannot run SelectorDecomposerAgent example.")
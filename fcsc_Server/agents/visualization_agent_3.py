@@ -3,7 +3,7 @@ import time
 import openai
 import json
 import pandas as pd
-from flotorch.sdk.llm import FlotorchLLM
+from utils.llm_client import get_llm_client
 from dotenv import load_dotenv
 load_dotenv()
 class VisualizationAgent:
@@ -16,11 +16,7 @@ class VisualizationAgent:
         start_time = time.time()
         try:
             # client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            client = FlotorchLLM(
-                model_id=os.getenv("FLOTORCH_MODEL"),
-                api_key=os.getenv("FLOTORCH_API_KEY"),
-                base_url=os.getenv("FLOTORCH_BASE_URL")
-            )
+            client = get_llm_client()
 
             # Metadata preparation
             columns_info = {col: str(df[col].dtype) for col in df.columns}
@@ -0,0 +1,54 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from backends.base import DatabaseBackend, create_table_statement
+
+load_dotenv()
+
+# Which database backend to use: "supabase" (default) or "sqlite" (local embedded engine)
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+
+_backend: DatabaseBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str = DB_BACKEND) -> DatabaseBackend:
+    """
+    Instantiates the backend with the given name. Backend modules are imported here,
+    so the Supabase client library is only needed when the Supabase backend is used.
+    """
+    if name == "supabase":
+        from backends.supabase_backend import SupabaseBackend
+        return SupabaseBackend()
+    if name == "sqlite":
+        from backends.sqlite_backend import SqliteBackend
+        return SqliteBackend()
+    raise ValueError(f"Unknown DB_BACKEND '{name}'. Expected 'supabase' or 'sqlite'.")
+
+
+def get_backend() -> DatabaseBackend:
+    """
+    Returns the process-wide backend selected by DB_BACKEND, creating it on first use
+    (not at import time, so modules can be imported without a live database).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: DatabaseBackend | None):
+    """
+    Replaces the process-wide backend (None resets it to DB_BACKEND on next use),
+    e.g. to point a benchmark at a prepared SQLite database.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+__all__ = ["DatabaseBackend", "create_table_statement", "DB_BACKEND", "create_backend", "get_backend", "set_backend"]
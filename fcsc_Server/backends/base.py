@@ -0,0 +1,140 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Iterator
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Longest a single statement may run in the database (0 disables the limit)
+DB_STATEMENT_TIMEOUT_SECONDS = float(os.getenv("DB_STATEMENT_TIMEOUT_SECONDS", "30"))
+# Most LIMIT/OFFSET windows iter_query fetches on backends without a streaming cursor (each window re-runs the query)
+RESULT_STREAM_MAX_WINDOWS = int(os.getenv("RESULT_STREAM_MAX_WINDOWS", "50"))
+
+
+def create_table_statement(table_name: str, columns: list[tuple[str, str]]) -> str:
+    """
+    Renders a CREATE TABLE statement. Table and column names are double-quoted so keywords
+    and special characters are safe in both PostgreSQL and SQLite.
+
+    Args:
+        table_name (str): The (already cleaned) table name.
+        columns (list[tuple[str, str]]): (column_name, sql_type) pairs.
+    """
+    cols = ", ".join(f'"{col_name}" {sql_type}' for col_name, sql_type in columns)
+    return f'CREATE TABLE "{table_name}" ({cols});'
+
+
+class DatabaseBackend(ABC):
+    """
+    Interface every database backend implements: schema introspection, query execution,
+    table creation and bulk insert. `database.py` and `fast_api_file_upload.py` only talk
+    to the database through this interface.
+    """
+
+    # Short backend name, reported by /metrics and in logs
+    name: str = "base"
+    # Whether insert_rows may be called from several threads at once (bulk ingestion submits batches concurrently)
+    concurrent_inserts: bool = True
+
+    @abstractmethod
+    def execute(self, sql: str) -> list[dict[str, Any]]:
+        """
+        Executes a SQL statement and returns its rows as dictionaries (an empty list for
+        statements without a result). Raises on database errors.
+        """
+
+    @abstractmethod
+    def get_schema_columns(self) -> list[tuple[str, str, str]]:
+        """
+        Returns (table_name, column_name, data_type) for every column of every user table,
+        ordered by table name and then by column position.
+        """
+
+    @abstractmethod
+    def table_exists(self, table_name: str) -> bool:
+        """Returns True if the table exists."""
+
+    def create_table(self, table_name: str, columns: list[tuple[str, str]]) -> bool:
+        """
+        Creates a table with the given (column_name, sql_type) columns.
+        Returns True on success. Raises on database errors.
+        """
+        self.execute(create_table_statement(table_name, columns))
+        return True
+
+    def drop_table(self, table_name: str):
+        """Drops a table if it exists. Raises on database errors."""
+        self.execute(f'DROP TABLE IF EXISTS "{table_name}";')
+
+    @abstractmethod
+    def insert_rows(self, table_name: str, rows: list[dict[str, Any]]) -> int:
+        """
+        Inserts rows (dictionaries keyed by column name) into a table and returns how many
+        rows were inserted. Raises on database errors.
+        """
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        """
+        True if a failed insert_rows call certainly wrote nothing, so sending the batch again cannot
+        duplicate rows (e.g. the connection was refused). Errors raised after the batch may have
+        reached the database, such as read timeouts, are not retryable.
+        """
+        return isinstance(error, ConnectionRefusedError)
+
+    @property
+    def supports_copy(self) -> bool:
+        """True if copy_rows() can bulk-load data (e.g. PostgreSQL COPY)."""
+        return False
+
+    def copy_rows(self, table_name: str, df) -> int:
+        """
+        Bulk-loads a DataFrame (columns already named like the table's) in one streaming operation
+        and returns the number of rows loaded. Only available when supports_copy is True.
+        """
+        raise NotImplementedError(f"The {self.name} backend does not support COPY.")
+
+    def iter_query(self, sql: str, chunk_rows: int) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yields the rows of a query in chunks of chunk_rows, holding one chunk in memory at a time.
+
+        Backends with a streaming cursor run the query once. This fallback fetches LIMIT/OFFSET
+        windows of the query ordered by every output column, so windows neither overlap nor skip
+        rows. Every window re-runs the query, so it raises once RESULT_STREAM_MAX_WINDOWS windows
+        have been fetched and rows remain.
+        """
+        sql = sql.strip().rstrip(";").strip()
+        first_row = self.execute(f"SELECT * FROM (\n{sql}\n) AS _window LIMIT 1")
+        if not first_row:
+            return
+        order_by = ", ".join(str(position) for position in range(1, len(first_row[0]) + 1))
+        ordered_sql = f"SELECT * FROM (\n{sql}\n) AS _window ORDER BY {order_by}"
+        offset = 0
+        for _ in range(RESULT_STREAM_MAX_WINDOWS):
+            rows = self.execute(f"{ordered_sql} LIMIT {chunk_rows} OFFSET {offset}") or []
+            if rows:
+                yield rows
+            if len(rows) < chunk_rows:
+                return
+            offset += len(rows)
+        if self.execute(f"{ordered_sql} LIMIT 1 OFFSET {offset}"):
+            raise RuntimeError(
+                f"Result stream stopped after {offset} rows (RESULT_STREAM_MAX_WINDOWS={RESULT_STREAM_MAX_WINDOWS} "
+                f"windows); the {self.name} backend has no streaming cursor for larger results."
+            )
+
+    def get_table_schema(self, table_name: str) -> list[tuple[str, str]]:
+        """Returns (column_name, data_type) for every column of a table, in column order."""
+        return [(col, col_type) for table, col, col_type in self.get_schema_columns() if table == table_name]
+
+    def get_table_columns(self, table_name: str) -> list[str]:
+        """Returns the column names of a table, in column order."""
+        return [col for col, _ in self.get_table_schema(table_name)]
+
+    def explain(self, sql: str) -> dict[str, Any] | None:
+        """
+        Returns the planner's estimates for a query without running it:
+        {"total_cost", "plan_rows", "node_types", "seq_scans", "cartesian_join", "plan"}.
+        Estimates a backend cannot provide are None. Returns None if the backend has no EXPLAIN support.
+        """
+        return None
@@ -0,0 +1,214 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+import contextlib
+from typing import Any, Iterator
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from dotenv import load_dotenv
+
+from backends.base import DatabaseBackend, DB_STATEMENT_TIMEOUT_SECONDS
+
+load_dotenv()
+
+# Database file of the local engine (":memory:" for a throwaway in-process database)
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "local.db")
+
+
+def _adapt_value(value: Any) -> Any:
+    """Converts values pandas produces into types sqlite3 can bind."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "isoformat"): # datetime, date, pandas Timestamp
+        return value.isoformat()
+    if hasattr(value, "item"): # numpy scalars
+        return value.item()
+    return value
+
+
+# EXPLAIN QUERY PLAN nodes whose children are a separate SELECT
+_SEPARATE_SELECT_NODES = ("UNION", "LIST SUBQUERY", "SCALAR SUBQUERY")
+
+
+def _scanned_table(detail: str) -> str | None:
+    """
+    Returns the table (or alias) of an EXPLAIN QUERY PLAN "SCAN" step, or None for scans that read
+    no table. Handles both "SCAN s" and the pre-3.36 "SCAN TABLE sales AS s" formats.
+    """
+    tokens = detail.split()[1:]
+    if tokens and tokens[0] == "TABLE":
+        tokens = tokens[1:]
+    if not tokens or tokens[0] in ("CONSTANT", "SUBQUERY"):
+        return None
+    return tokens[0]
+
+
+def _table_aliases(sql: str) -> dict[str, str]:
+    """Maps the lower-cased aliases in a query to the tables they stand for."""
+    try:
+        statement = sqlglot.parse_one(sql, read="sqlite")
+    except SqlglotError:
+        return {}
+    if statement is None:
+        return {}
+    return {table.alias.lower(): table.name for table in statement.find_all(exp.Table) if table.alias and table.name}
+
+
+class SqliteBackend(DatabaseBackend):
+    """
+    Local embedded backend on SQLite, for running the whole pipeline on-box without
+    network round-trips (low-latency deployments, reproducible performance tests).
+
+    Each thread gets its own connection, since blocking calls run on the shared executor.
+    Statements running longer than DB_STATEMENT_TIMEOUT_SECONDS are interrupted.
+    """
+
+    name = "sqlite"
+    # SQLite allows one writer at a time; concurrent batches would only wait on the database lock
+    concurrent_inserts = False
+
+    def __init__(self, path: str = SQLITE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._memory_conn = None
+        self._lock = contextlib.nullcontext()
+        if path == ":memory:":
+            # A private in-memory database only exists on one connection, so share it (serialized by a lock)
+            self._memory_conn = sqlite3.connect(path, check_same_thread=False)
+            self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._memory_conn is not None:
+            return self._memory_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def _set_deadline(self, conn: sqlite3.Connection):
+        """Interrupts the next statement on conn once DB_STATEMENT_TIMEOUT_SECONDS have passed."""
+        if DB_STATEMENT_TIMEOUT_SECONDS <= 0:
+            return
+        deadline = time.monotonic() + DB_STATEMENT_TIMEOUT_SECONDS
+        # Called every 10k virtual machine instructions; a non-zero return aborts with "interrupted"
+        conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+
+    def execute(self, sql: str) -> list[dict[str, Any]]:
+        sql = sql.strip().rstrip(";")
+        conn = self._connection()
+        with self._lock:
+            self._set_deadline(conn)
+            cursor = conn.execute(sql)
+            if cursor.description is None:
+                conn.commit()
+                return []
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def iter_query(self, sql: str, chunk_rows: int) -> Iterator[list[dict[str, Any]]]:
+        # One cursor, run once. The stream gets its own connection, since Starlette may fetch each
+        # chunk on a different worker thread (an in-memory database only has the shared one).
+        sql = sql.strip().rstrip(";")
+        conn = self._memory_conn or sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            with self._lock:
+                self._set_deadline(conn)
+                cursor = conn.execute(sql)
+            if cursor.description is None:
+                return
+            columns = [col[0] for col in cursor.description]
+            while True:
+                with self._lock:
+                    self._set_deadline(conn)
+                    rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    return
+                yield [dict(zip(columns, row)) for row in rows]
+        finally:
+            if conn is not self._memory_conn:
+                conn.close()
+
+    def get_schema_columns(self) -> list[tuple[str, str, str]]:
+        # One query for every table's columns, instead of a PRAGMA table_info per table
+        rows = self.execute("""
+        SELECT m.name AS table_name, p.name AS column_name, p.type AS data_type
+        FROM sqlite_master m JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.name, p.cid
+        """)
+        return [(row["table_name"], row["column_name"], (row["data_type"] or "text").lower()) for row in rows]
+
+    def get_table_schema(self, table_name: str) -> list[tuple[str, str]]:
+        conn = self._connection()
+        with self._lock:
+            rows = conn.execute("SELECT name, type FROM pragma_table_info(?) ORDER BY cid", (table_name,)).fetchall()
+        return [(name, (col_type or "text").lower()) for name, col_type in rows]
+
+    def table_exists(self, table_name: str) -> bool:
+        conn = self._connection()
+        with self._lock:
+            row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone()
+        return row is not None
+
+    def insert_rows(self, table_name: str, rows: list[dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        col_list = ", ".join(f'"{col}"' for col in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f'INSERT INTO "{table_name}" ({col_list}) VALUES ({placeholders})'
+        conn = self._connection()
+        with self._lock:
+            with conn: # One transaction for the whole batch
+                conn.executemany(sql, ([_adapt_value(row.get(col)) for col in columns] for row in rows))
+        return len(rows)
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        # A locked or busy database fails the batch's transaction before anything is committed
+        if isinstance(error, sqlite3.OperationalError):
+            message = str(error).lower()
+            return "locked" in message or "busy" in message
+        return super().is_retryable_error(error)
+
+    def explain(self, sql: str) -> dict[str, Any] | None:
+        # SQLite's planner gives no cost or row estimates, only the access path of each table
+        sql = sql.strip().rstrip(";")
+        rows = self.execute(f"EXPLAIN QUERY PLAN {sql}")
+        aliases = _table_aliases(sql)
+        details = [row.get("detail", "") for row in rows]
+        seq_scans = []
+        levels: dict[int, list[str]] = {} # Access paths of each SELECT, keyed by the id of its parent node
+        for row in rows:
+            detail = row.get("detail", "")
+            if detail.startswith("SCAN "):
+                table = _scanned_table(detail)
+                if table is None:
+                    continue
+                seq_scans.append(aliases.get(table.lower(), table))
+            elif not detail.startswith("SEARCH "):
+                continue
+            levels.setdefault(row.get("parent", 0), []).append(detail)
+        parent_details = {row.get("id"): row.get("detail", "") for row in rows}
+        cartesian_join = False
+        for parent, steps in levels.items():
+            # Each arm of a UNION and each IN/scalar subquery is its own SELECT, not a join partner of the outer one
+            if parent_details.get(parent, "").replace("CORRELATED ", "").startswith(_SEPARATE_SELECT_NODES):
+                continue
+            # Two full scans in one SELECT with no index lookup between them: every row pairs with every row
+            if sum(step.startswith("SCAN ") for step in steps) > 1 and not any(step.startswith("SEARCH ") for step in steps):
+                cartesian_join = True
+        return {
+            "total_cost": None,
+            "plan_rows": None,
+            "node_types": details,
+            "seq_scans": seq_scans,
+            "cartesian_join": cartesian_join,
+            "plan": details,
+        }
@@ -0,0 +1,241 @@
+import io
+import os
+import re
+import json
+from typing import Any, Iterator
+
+import httpx
+from supabase import create_client, Client, ClientOptions
+from dotenv import load_dotenv
+
+from backends.base import DatabaseBackend, DB_STATEMENT_TIMEOUT_SECONDS
+
+load_dotenv()
+
+# Name of the Postgres function we call
+SQL_FUNCTION_NAME = "run_sql"
+# Function returning EXPLAIN (FORMAT JSON) for a query; run_sql cannot run EXPLAIN inside its subquery
+EXPLAIN_FUNCTION_NAME = "explain_sql"
+
+
+# Plan node fields holding a condition that can reference the outer side of a nested loop
+_PLAN_CONDITION_KEYS = ("Index Cond", "Recheck Cond", "Filter", "Hash Cond", "Cache Key", "Join Filter")
+# Plan nodes that only buffer their input; the join condition, if any, sits below them
+_PASS_THROUGH_NODES = {"Memoize", "Materialize"}
+
+
+def _plan_aliases(node: dict[str, Any]) -> set[str]:
+    """Returns the aliases of every relation read in a plan subtree."""
+    aliases, stack = set(), [node]
+    while stack:
+        current = stack.pop()
+        if current.get("Alias"):
+            aliases.add(current["Alias"])
+        stack.extend(current.get("Plans", []))
+    return aliases
+
+
+def _is_unconditioned_nested_loop(node: dict[str, Any]) -> bool:
+    """
+    True if a Nested Loop pairs every outer row with every inner row: it has no join filter, neither
+    side is a single row, and no condition on the inner side references the outer relation (as a
+    parameterized index lookup or filter would, possibly below a Memoize or Materialize node).
+    """
+    plans = node.get("Plans", [])
+    if "Join Filter" in node or len(plans) != 2:
+        return False
+    outer, inner = plans
+    if outer.get("Plan Rows", 2) <= 1 or inner.get("Plan Rows", 2) <= 1:
+        return False
+    while inner.get("Node Type") in _PASS_THROUGH_NODES and inner.get("Plans"):
+        if "Cache Key" in inner: # Memoize caches inner results per outer key, so the inner side is parameterized
+            return False
+        inner = inner["Plans"][0]
+    aliases = _plan_aliases(outer)
+    if not aliases:
+        return True
+    # "s.id" or '"Sales".id', but not the "s." inside "sales.id"
+    outer_ref = re.compile("|".join(rf'(?<![\w"]){re.escape(alias)}\.|"{re.escape(alias)}"\.' for alias in aliases))
+    stack = [inner]
+    while stack:
+        current = stack.pop()
+        for key in _PLAN_CONDITION_KEYS:
+            if key in current and outer_ref.search(current[key]):
+                return False
+        stack.extend(current.get("Plans", []))
+    return True
+
+
+class SupabaseBackend(DatabaseBackend):
+    """
+    Supabase (PostgreSQL) backend. Every statement goes through the `run_sql(query text)`
+    RPC function, which must exist in the Supabase project.
+
+    The HTTP client gives up after DB_STATEMENT_TIMEOUT_SECONDS; this backend sets no timeout in the
+    database itself. Postgres only stops the statement if the API key's role has a statement_timeout,
+    which PostgREST applies at the start of every request (see README). A `SET statement_timeout` on
+    run_sql would not work: it only takes effect after the calling statement has started.
+
+    If SUPABASE_DB_URL (the project's direct Postgres connection string) is set, bulk ingestion
+    uses COPY over psycopg2 instead of batched REST inserts.
+    """
+
+    name = "supabase"
+
+    def __init__(self, url: str | None = None, key: str | None = None):
+        url = url or os.getenv("SUPABASE_URL")
+        key = key or os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            print("WARNING: SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
+            print("Please ensure your .env file is correctly set up.")
+        options = ClientOptions(postgrest_client_timeout=DB_STATEMENT_TIMEOUT_SECONDS) if DB_STATEMENT_TIMEOUT_SECONDS > 0 else None
+        self.client: Client = create_client(url, key, options=options)
+        self.db_url = os.getenv("SUPABASE_DB_URL")
+        self._explain_unavailable = False # Set once explain_sql turns out to be missing, to skip the round-trip
+
+    def execute(self, sql: str) -> list[dict[str, Any]]:
+        # Ensure query does NOT end with a semicolon
+        sql = sql.strip()
+        if sql.endswith(";"):
+            sql = sql[:-1]
+
+        response = self.client.rpc(SQL_FUNCTION_NAME, {"query": sql}).execute()
+
+        # supabase-py v2 style: response has .data and .error
+        if getattr(response, "error", None):
+            raise RuntimeError(response.error)
+
+        # response.data is a list of JSON objects or raw rows (depending on your function)
+        return response.data or []
+
+    def get_schema_columns(self) -> list[tuple[str, str, str]]:
+        data = self.execute("""
+        SELECT table_name, column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'public'
+        ORDER BY table_name, ordinal_position
+        """)
+        return [(row["table_name"], row["column_name"], row["data_type"]) for row in data]
+
+    def table_exists(self, table_name: str) -> bool:
+        data = self.execute(f"SELECT to_regclass('public.\"{table_name}\"');")
+        return bool(data) and data[0].get("to_regclass") is not None
+
+    def create_table(self, table_name: str, columns: list[tuple[str, str]]) -> bool:
+        super().create_table(table_name, columns)
+        # Tables created through run_sql have row level security on; the API key could not read them otherwise
+        try:
+            self.execute(f'ALTER TABLE "public"."{table_name}" DISABLE ROW LEVEL SECURITY;')
+            print(f"🔓 RLS disabled for `{table_name}`.")
+        except Exception as e:
+            print(f"⚠️ RLS might not be disabled for `{table_name}`: {e}")
+        return True
+
+    def insert_rows(self, table_name: str, rows: list[dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        result = self.client.table(table_name).insert(rows).execute()
+        return len(result.data or [])
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        # The request never reached PostgREST, or PostgREST could not connect to the database
+        # (PGRST000-PGRST002); in both cases nothing was inserted
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True
+        if getattr(error, "code", None) in {"PGRST000", "PGRST001", "PGRST002"}:
+            return True
+        return super().is_retryable_error(error)
+
+    @property
+    def supports_copy(self) -> bool:
+        return bool(self.db_url)
+
+    def copy_rows(self, table_name: str, df) -> int:
+        import psycopg2 # Only needed for COPY ingestion
+
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False) # Missing values become empty fields, i.e. NULL
+        buffer.seek(0)
+        col_list = ", ".join(f'"{col}"' for col in df.columns)
+        conn = psycopg2.connect(self.db_url)
+        try:
+            with conn, conn.cursor() as cursor: # Commits on success, rolls back on error
+                cursor.copy_expert(f'COPY "public"."{table_name}" ({col_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            conn.close()
+        return len(df)
+
+    def iter_query(self, sql: str, chunk_rows: int) -> Iterator[list[dict[str, Any]]]:
+        if not self.db_url:
+            # run_sql returns the whole result at once; fall back to ordered LIMIT/OFFSET windows
+            yield from super().iter_query(sql, chunk_rows)
+            return
+        import psycopg2 # Only needed for cursor streaming
+        from psycopg2.extras import RealDictCursor
+
+        # With a direct connection the statement timeout is enforced by Postgres itself
+        options = f"-c statement_timeout={int(DB_STATEMENT_TIMEOUT_SECONDS * 1000)}" if DB_STATEMENT_TIMEOUT_SECONDS > 0 else None
+        conn = psycopg2.connect(self.db_url, options=options)
+        try:
+            conn.set_session(readonly=True)
+            # A named cursor is a server-side cursor: the query runs once and each fetchmany pulls the next chunk
+            with conn.cursor(name="result_stream", cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(sql.strip().rstrip(";"))
+                while True:
+                    rows = cursor.fetchmany(chunk_rows)
+                    if not rows:
+                        return
+                    yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def get_table_columns(self, table_name: str) -> list[str]:
+        data = self.execute(f"""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = '{table_name}'
+        ORDER BY ordinal_position
+        """)
+        return [row["column_name"] for row in data]
+
+    def explain(self, sql: str) -> dict[str, Any] | None:
+        if self._explain_unavailable:
+            return None
+        sql = sql.strip().rstrip(";")
+        try:
+            response = self.client.rpc(EXPLAIN_FUNCTION_NAME, {"query": sql}).execute()
+        except Exception as e:
+            if getattr(e, "code", None) == "PGRST202": # PostgREST: function not found
+                self._explain_unavailable = True
+                print(f"⚠️ The {EXPLAIN_FUNCTION_NAME}(query text) function is missing; the cost guard is unavailable "
+                      f"on this Supabase project until it is created (see README).")
+                return None
+            raise
+        # explain_sql returns the EXPLAIN (FORMAT JSON) document: [{"Plan": {...}}]
+        plan_doc = response.data
+        if isinstance(plan_doc, str):
+            plan_doc = json.loads(plan_doc)
+        if isinstance(plan_doc, list):
+            plan_doc = plan_doc[0] if plan_doc else None
+        if not isinstance(plan_doc, dict) or "Plan" not in plan_doc:
+            raise RuntimeError(f"Unexpected EXPLAIN output: {str(response.data)[:200]}")
+
+        root = plan_doc["Plan"]
+        node_types, seq_scans, cartesian_join = [], [], False
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node_types.append(node.get("Node Type"))
+            if node.get("Node Type") == "Seq Scan":
+                seq_scans.append(node.get("Relation Name"))
+            if node.get("Node Type") == "Nested Loop" and _is_unconditioned_nested_loop(node):
+                cartesian_join = True
+            stack.extend(node.get("Plans", []))
+        return {
+            "total_cost": root.get("Total Cost"),
+            "plan_rows": root.get("Plan Rows"),
+            "node_types": node_types,
+            "seq_scans": seq_scans,
+            "cartesian_join": cartesian_join,
+            "plan": root,
+        }
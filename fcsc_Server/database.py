@@ -1,92 +1,136 @@
 import pandas as pd
-from supabase import create_client, Client
+from typing import Iterator
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+from backends import get_backend, DatabaseBackend
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+load_dotenv()
 
-# Name of the Postgres function we call
-SQL_FUNCTION_NAME = "run_sql"
+# Maximum rows fetched for one generated query (0 disables the cap)
+RESULT_ROW_CAP = int(os.getenv("RESULT_ROW_CAP", "10000"))
+# Rows fetched per round-trip by iter_sql_query_chunks
+RESULT_FETCH_CHUNK_ROWS = int(os.getenv("RESULT_FETCH_CHUNK_ROWS", "1000"))
 
 
-def get_db_connection(db_path: str = None) -> Client:
-    return supabase
+def get_db_connection(db_path: str = None) -> DatabaseBackend:
+    """
+    Returns the configured database backend (DB_BACKEND: Supabase or local SQLite).
+    """
+    return get_backend()
 
 
-def call_sql_function(conn: Client, query: str):
+def call_sql_function(conn: DatabaseBackend, query: str):
     """
-    Helper to call the run_sql(query text) function and handle errors.
+    Helper to execute a query on the backend and return its rows as a list of dicts.
     """
-    # Ensure query does NOT end with a semicolon
-    query = query.strip()
-    if query.endswith(";"):
-        query = query[:-1]
+    return conn.execute(query)
 
-    response = conn.rpc(SQL_FUNCTION_NAME, {"query": query}).execute()
 
-    # supabase-py v2 style: response has .data and .error
-    if getattr(response, "error", None):
-        raise RuntimeError(response.error)
+def get_table_names(conn: DatabaseBackend) -> list[str]:
+    return list(dict.fromkeys(table_name for table_name, _, _ in conn.get_schema_columns()))
 
-    # response.data is a list of JSON objects or raw rows (depending on your function)
-    return response.data
 
+def get_table_schema(conn: DatabaseBackend, table_name: str) -> list[tuple]:
+    return conn.get_table_schema(table_name)
 
-def get_table_names(conn: Client) -> list[str]:
-    query = """
-    SELECT table_name 
-    FROM information_schema.tables 
-    WHERE table_schema = 'public'
-    """
-    data = call_sql_function(conn, query)
 
-    # data is a list of JSON rows like {"table_name": "..."}
-    return [row["table_name"] for row in data]
+def get_schema_columns(conn: DatabaseBackend) -> list[tuple]:
+    """
+    Fetches every column of every table in a single introspection call,
+    ordered by table name and then by column position.
+    """
+    return conn.get_schema_columns()
 
 
-def get_table_schema(conn: Client, table_name: str) -> list[tuple]:
-    query = f"""
-    SELECT column_name, data_type
-    FROM information_schema.columns
-    WHERE table_schema = 'public' AND table_name = '{table_name}'
+def build_schema_string(columns: list[tuple]) -> str:
+    """
+    Renders (table_name, column_name, data_type) rows, grouped by table, into the schema string
+    format the agents expect.
     """
-    data = call_sql_function(conn, query)
-    return [(row["column_name"], row["data_type"]) for row in data]
+    tables: dict[str, list[tuple]] = {}
+    for table_name, col_name, col_type in columns:
+        tables.setdefault(table_name, []).append((col_name, col_type))
+
+    parts = ["Database Schema:\n"]
+    for table_name, table_schema in tables.items():
+        column_lines = ",\n".join(f"  {col_name} {col_type}" for col_name, col_type in table_schema)
+        parts.append(f"Table: {table_name} (\n{column_lines}\n);\n")
+    return "".join(parts)
 
 
 def get_database_schema_string(db_path: str = None) -> str:
-    schema_string = "Database Schema:\n"
     try:
         conn = get_db_connection()
-        table_names = get_table_names(conn)
-        if not table_names:
+        # One introspection call for all tables instead of one per table
+        columns = get_schema_columns(conn)
+        if not columns:
             return "No tables found in the database."
-        for table_name in table_names:
-            schema_string += f"Table: {table_name} (\n"
-            table_schema = get_table_schema(conn, table_name)
-            for col_name, col_type in table_schema:
-                schema_string += f"  {col_name} {col_type},\n"
-            schema_string = schema_string.rstrip(",\n") + "\n);\n"
+        return build_schema_string(columns)
     except Exception as e:
         return f"Error loading database schema: {e}"
-    return schema_string
 
 
-def execute_sql_query_db(sql_query: str, db_path: str = None) -> pd.DataFrame | None:
+def cap_sql_query(sql_query: str, row_cap: int) -> str:
+    """
+    Wraps a query so the database returns at most row_cap + 1 rows; the extra row
+    tells the caller that the result was truncated.
+    """
+    sql_query = sql_query.strip().rstrip(";").strip()
+    return f"SELECT * FROM (\n{sql_query}\n) AS _capped LIMIT {row_cap + 1}"
+
+
+def execute_sql_query_db(sql_query: str, db_path: str = None, row_cap: int = RESULT_ROW_CAP) -> pd.DataFrame | None:
+    """
+    Executes a generated query and returns its result, capped at row_cap rows.
+
+    When the query returned more rows than row_cap, the extra rows are dropped and
+    `df.attrs["truncated"]` is set to True.
+    """
     try:
         conn = get_db_connection()
-        data = call_sql_function(conn, sql_query)
+        data = call_sql_function(conn, cap_sql_query(sql_query, row_cap) if row_cap > 0 else sql_query) or []
         # data should be a list of dict-like JSON rows
-        return pd.DataFrame(data)
+        truncated = row_cap > 0 and len(data) > row_cap
+        df = pd.DataFrame(data[:row_cap] if truncated else data)
+        df.attrs["truncated"] = truncated
+        return df
     except Exception as e:
         print(f"Error executing SQL query: {e}")
         return None
 
 
+def iter_sql_query_chunks(sql_query: str, chunk_rows: int = RESULT_FETCH_CHUNK_ROWS, max_rows: int = 0) -> Iterator[list[dict]]:
+    """
+    Executes a query and yields its rows in chunks of chunk_rows as they arrive, so only one
+    chunk is held in memory at a time (see DatabaseBackend.iter_query).
+
+    Args:
+        sql_query (str): The query to execute.
+        chunk_rows (int): Rows per chunk.
+        max_rows (int): Stop after this many rows (0 = no limit).
+
+    Yields:
+        list[dict]: The rows of one chunk. Raises on database errors.
+    """
+    conn = get_db_connection()
+    if max_rows > 0:
+        chunk_rows = min(chunk_rows, max_rows)
+    chunks = conn.iter_query(sql_query.strip().rstrip(";").strip(), chunk_rows)
+    remaining = max_rows
+    try:
+        for rows in chunks:
+            if max_rows > 0:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            if rows:
+                yield rows
+            if max_rows > 0 and remaining <= 0:
+                return
+    finally:
+        chunks.close() # Releases the backend's cursor when the client stops early
+
+
 if __name__ == "__main__":
     print("\n--- Database Schema ---")
     schema_str = get_database_schema_string()
@@ -1,17 +1,25 @@
+import os
+import re
+import time
+import shutil
+import tempfile
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, BinaryIO, Callable
+from dotenv import load_dotenv
 
+from backends import get_backend, create_table_statement
 
-import pandas as pd
-from supabase import create_client, Client
-import re
-import os
-# supabase: Client = create_client(url, key)
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-if not url or not key:
-    print("WARNING: SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
-    print("Please ensure your .env file is correctly set up.")
+load_dotenv()
 
-supabase: Client = create_client(url, key)
+# Bulk ingestion: rows per insert batch, batches in flight at once, retries per failed batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+# CSV uploads: rows parsed (and ingested) per chunk, rows read up front to infer column types, bytes per spool write
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "50000"))
+UPLOAD_SAMPLE_ROWS = int(os.getenv("UPLOAD_SAMPLE_ROWS", "10000"))
+UPLOAD_SPOOL_CHUNK_BYTES = int(os.getenv("UPLOAD_SPOOL_CHUNK_BYTES", str(1024 * 1024)))
 
 
 # Clean column names to be SQL-safe
@@ -35,38 +43,34 @@ def map_dtype(dtype) -> str:
         return "TEXT"
 
 # Generate CREATE TABLE SQL
+def table_columns(df: pd.DataFrame) -> list[tuple[str, str]]:
+    """Returns the (cleaned column name, SQL type) pairs for a DataFrame's table."""
+    return [(clean_column_name(col), map_dtype(df[col].dtype)) for col in df.columns]
+
 def create_table_sql(table_name: str, df: pd.DataFrame) -> str:
-    cols = []
-    for col in df.columns:
-        col_name = clean_column_name(col)
-        sql_type = map_dtype(df[col].dtype)
-        # Wrap column names in double quotes to handle keywords or special characters
-        cols.append(f'"{col_name}" {sql_type}')
-    return f'CREATE TABLE "{table_name}" ({", ".join(cols)});'
+    # Column names are wrapped in double quotes to handle keywords or special characters
+    return create_table_statement(table_name, table_columns(df))
 
 
-# Run a raw SQL query using Supabase client's rpc call
+# Run a raw SQL query on the configured database backend
 def run_sql(sql: str):
-    """Executes a SQL query using Supabase RPC. Requires 'run_sql' RPC function on Supabase."""
+    """Executes a SQL query on the database backend. Returns the result rows, or None on error."""
     try:
-        result = supabase.rpc("run_sql", {"query": sql}).execute()
-        return result
+        return get_backend().execute(sql)
     except Exception as e:
-        print(f"Error executing raw SQL via RPC: {e}")
-        return None 
+        print(f"Error executing raw SQL: {e}")
+        return None
 
 # Check if table exists
 def table_exists(table_name: str) -> bool:
-    """Checks if a table exists in the public schema."""
-    sql = f"SELECT to_regclass('public.\"{table_name}\"');" 
-    print(f"Checking if table '{table_name}' exists with SQL: {sql}")
-    result = run_sql(sql) 
-
-    if result and result.data and result.data[0].get("to_regclass") is not None:
-        print(f"Table '{table_name}' exists.")
-        return True
-    print(f"Table '{table_name}' does not exist or check failed. Result: {result}")
-    return False
+    """Checks if a table exists in the database."""
+    try:
+        exists = get_backend().table_exists(table_name)
+    except Exception as e:
+        print(f"Table existence check for '{table_name}' failed: {e}")
+        return False
+    print(f"Table '{table_name}' {'exists' if exists else 'does not exist'}.")
+    return exists
 
 # Create table safely
 def create_table_if_not_exists(df: pd.DataFrame, table_name: str) -> bool:
@@ -75,53 +79,220 @@ def create_table_if_not_exists(df: pd.DataFrame, table_name: str) -> bool:
         print(f"⚠️ Table `{table_name}` already exists. Skipping creation.")
         return False
     try:
-        sql = create_table_sql(table_name, df)
-        print(f"Attempting to create table '{table_name}' with SQL: {sql}")
-        result = run_sql(sql) 
-
-        if result and result.data is not None:
-            print(f"✅ Table `{table_name}` created successfully.")
-
-            # Disable RLS for the created table
-            disable_rls_sql = f'ALTER TABLE "public"."{table_name}" DISABLE ROW LEVEL SECURITY;'
-            print(f"Attempting to disable RLS for '{table_name}' with SQL: {disable_rls_sql}")
-            disable_result = run_sql(disable_rls_sql) 
-
-            if disable_result and disable_result.data is not None:
-                print(f"🔓 RLS disabled for `{table_name}`.")
-                return True
-            else:
-                print(f"⚠️ RLS might not be disabled for `{table_name}`. Result: {disable_result}")
-                return True 
-        else:
-            print(f"⚠️ Couldn't confirm table creation for `{table_name}`. Result: {result}")
-            return False
+        print(f"Attempting to create table '{table_name}' with SQL: {create_table_sql(table_name, df)}")
+        get_backend().create_table(table_name, table_columns(df))
+        print(f"✅ Table `{table_name}` created successfully.")
+        return True
     except Exception as e:
         print(f"❌ SQL Execution Error (creating {table_name}): {e}")
         return False
 
-# Insert data into Supabase
-def insert_data(df: pd.DataFrame, table_name: str):
-    """Inserts DataFrame records into the specified Supabase table."""
+def _insert_batch(backend, table_name: str, batch: pd.DataFrame, max_retries: int) -> tuple[int, int, Exception | None]:
+    """
+    Inserts one batch, retrying with exponential backoff. Returns (rows inserted, retries used, error).
+
+    Only errors the backend reports as retryable (the batch certainly wrote nothing, see
+    DatabaseBackend.is_retryable_error) are retried, so a retry never duplicates rows. Any other
+    error, e.g. a timeout after the batch reached the database, fails the batch at once.
+    """
+    # Records are built per batch, so only the batches in flight exist as dicts; NaN is sent as NULL
+    records = batch.astype(object).where(batch.notna(), None).to_dict(orient="records")
+    for attempt in range(max_retries + 1):
+        try:
+            backend.insert_rows(table_name, records)
+            return len(records), attempt, None
+        except Exception as e:
+            if attempt == max_retries or not backend.is_retryable_error(e):
+                return 0, attempt, e
+            time.sleep(0.5 * (2 ** attempt))
+
+
+# Insert data into the database
+def insert_data(df: pd.DataFrame, table_name: str, batch_size: int = INGEST_BATCH_SIZE,
+                concurrency: int = INGEST_CONCURRENCY, max_retries: int = INGEST_MAX_RETRIES,
+                table_columns_db: set[str] | None = None) -> Dict[str, Any]:
+    """
+    Inserts DataFrame records into the specified table.
+
+    Uses COPY when the backend supports it; otherwise the rows are sent in batches of `batch_size`,
+    up to `concurrency` batches at a time (one at a time if the backend does not allow concurrent
+    inserts), and a batch that failed without writing anything is retried up to `max_retries` times.
+    Pass `table_columns_db` (the table's column names) to skip looking them up, e.g. when inserting
+    a file chunk by chunk.
+
+    Returns:
+        Dict[str, Any]: Ingestion statistics: "method", "rows_inserted", "rows_failed", "batches",
+                        "failed_batches", "retries", "seconds", "rows_per_second" and "errors".
+    """
+    start_time = time.time()
+    stats = {"method": None, "rows_inserted": 0, "rows_failed": 0, "batches": 0, "failed_batches": 0,
+             "retries": 0, "seconds": 0.0, "rows_per_second": 0.0, "errors": []}
+
     # Clean column names in the DataFrame to match the database's cleaned names
     df.columns = [clean_column_name(col) for col in df.columns]
-    data = df.to_dict(orient="records")
 
     try:
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        if not response.data:
-            print(f"⚠️ Table `{table_name}` is empty. Proceeding with insert.")
+        backend = get_backend()
+        if table_columns_db is None:
+            table_columns_db = set(backend.get_table_columns(table_name))
+        df_columns = set(df.columns)
+        if table_columns_db and not df_columns.issubset(table_columns_db):
+            error = f"Column mismatch in `{table_name}`. Expected: {table_columns_db}. Provided: {df_columns}"
+            print(f"❌ {error}")
+            stats["errors"].append(error)
+            stats["rows_failed"] = len(df)
+            return stats
+
+        if backend.supports_copy:
+            stats["method"] = "copy"
+            stats["batches"] = 1
+            stats["rows_inserted"] = backend.copy_rows(table_name, df)
         else:
-            table_columns = set(response.data[0].keys())
-            df_columns = set(df.columns)
-            if not df_columns.issubset(table_columns):
-                print(f"❌ Column mismatch in `{table_name}`.\n\nExpected: {table_columns}\n\nProvided: {df_columns}")
-                return 
-
-        result = supabase.table(table_name).insert(data).execute()
-        if result.data:
-            print(f"✅ Inserted {len(result.data)} rows into `{table_name}`.")
+            stats["method"] = "batched_insert"
+            batches = [df.iloc[start:start + batch_size] for start in range(0, len(df), max(batch_size, 1))]
+            stats["batches"] = len(batches)
+            workers = max(1, concurrency if backend.concurrent_inserts else 1)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+                futures = {pool.submit(_insert_batch, backend, table_name, batch, max_retries): batch for batch in batches}
+                for future in as_completed(futures):
+                    inserted, retries, error = future.result()
+                    stats["rows_inserted"] += inserted
+                    stats["retries"] += retries
+                    if error is not None:
+                        stats["failed_batches"] += 1
+                        stats["rows_failed"] += len(futures[future])
+                        stats["errors"].append(f"Batch of {len(futures[future])} rows failed after {retries} retries: {error}")
+    except Exception as e:
+        print(f"❌ Insert Error for `{table_name}`: {e}")
+        stats["errors"].append(str(e))
+        stats["rows_failed"] = len(df) - stats["rows_inserted"]
+
+    stats["seconds"] = time.time() - start_time
+    stats["rows_per_second"] = round(stats["rows_inserted"] / stats["seconds"], 1) if stats["seconds"] > 0 else 0.0
+    if stats["rows_inserted"]:
+        print(f"✅ Inserted {stats['rows_inserted']} rows into `{table_name}` via {stats['method']} ({stats['rows_per_second']} rows/s).")
+    if stats["errors"]:
+        print(f"⚠️ Insert into `{table_name}` had errors: {stats['errors']}")
+    return stats
+
+
+# Spool an uploaded file to disk
+def spool_to_disk(fileobj: BinaryIO, chunk_bytes: int = UPLOAD_SPOOL_CHUNK_BYTES) -> str:
+    """
+    Copies a file object to a named temporary file, `chunk_bytes` at a time. Returns its path;
+    the caller deletes the file.
+    """
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=".csv", delete=False) as spool:
+        shutil.copyfileobj(fileobj, spool, chunk_bytes)
+        return spool.name
+
+# Infer column types from the first rows of a CSV file
+def infer_csv_dtypes(csv_path: str, sample_rows: int = UPLOAD_SAMPLE_ROWS) -> tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Reads the first `sample_rows` rows of a CSV file and derives the column types of its table.
+
+    Integer and boolean columns use pandas' nullable dtypes, so missing values are allowed anywhere.
+    Columns that are empty in the sample are text.
+
+    Returns:
+        tuple[pd.DataFrame, Dict[str, Any]]: The sample (with those dtypes applied), used to create
+                                             the table, and the dtypes by column name.
+    """
+    sample = pd.read_csv(csv_path, nrows=sample_rows)
+    dtypes = {}
+    for col in sample.columns:
+        dtype = sample[col].dtype
+        if sample[col].isna().all():
+            dtypes[col] = "object"
+        elif pd.api.types.is_bool_dtype(dtype):
+            dtypes[col] = "boolean"
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = "Int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = "float64"
         else:
-            print(f"⚠️ Insert attempt complete but no data returned for `{table_name}`.")
+            dtypes[col] = "object"
+    return sample.astype(dtypes), dtypes
+
+def _cast_chunk(chunk: pd.DataFrame, dtypes: Dict[str, Any]) -> list[str]:
+    """
+    Casts a chunk's columns to the types inferred from the sample. A column whose values in this chunk
+    do not fit (e.g. `10.5` in an integer column) is widened instead: to float if numeric, else kept as
+    parsed. Returns a warning per widened column.
+    """
+    warnings = []
+    for col, dtype in dtypes.items():
+        if col not in chunk.columns or dtype == "object":
+            continue
+        try:
+            chunk[col] = chunk[col].astype(dtype)
+        except (TypeError, ValueError):
+            if dtype == "Int64" and pd.api.types.is_numeric_dtype(chunk[col].dtype):
+                chunk[col] = chunk[col].astype("float64")
+            warnings.append(f"Column '{col}' has values that are not {dtype} (rows {chunk.index[0]}-{chunk.index[-1]}); sent as {chunk[col].dtype}.")
+    return warnings
+
+# Stream a CSV file into a table chunk by chunk
+def insert_csv_file(csv_path: str, table_name: str, dtypes: Dict[str, Any], chunk_rows: int = UPLOAD_CHUNK_ROWS,
+                    on_progress: Callable[[Dict[str, Any]], None] | None = None) -> Dict[str, Any]:
+    """
+    Parses a CSV file `chunk_rows` rows at a time and hands each chunk to insert_data, so only
+    one chunk is in memory at a time regardless of the file size. If given, `on_progress` is called
+    with the running statistics after every chunk.
+
+    Only text columns are read with a fixed type; the other columns are parsed per chunk and then cast
+    to `dtypes`, so values the sample did not anticipate widen the column (see _cast_chunk) instead
+    of failing the upload. The database may still reject such values for the column's type; those
+    batches are reported as failed.
+
+    Returns:
+        Dict[str, Any]: The insert_data statistics summed over all chunks, plus "chunks", "warnings"
+                        and "aborted" (True if the file could not be parsed to the end; chunks before
+                        the error were already inserted). "seconds" and "rows_per_second" cover
+                        parsing as well as inserting.
+    """
+    start_time = time.time()
+    stats = {"method": None, "rows_inserted": 0, "rows_failed": 0, "chunks": 0, "batches": 0, "failed_batches": 0,
+             "retries": 0, "seconds": 0.0, "rows_per_second": 0.0, "errors": [], "warnings": [], "aborted": False}
+    rows_read = 0
+    try:
+        table_columns_db = set(get_backend().get_table_columns(table_name)) # Looked up once, not per chunk
+    except Exception as e:
+        stats["errors"].append(f"Could not read the columns of `{table_name}`: {e}")
+        stats["aborted"] = True
+        stats["seconds"] = time.time() - start_time
+        return stats
+    text_dtypes = {col: dtype for col, dtype in dtypes.items() if dtype == "object"}
+    try:
+        with pd.read_csv(csv_path, dtype=text_dtypes, chunksize=max(chunk_rows, 1)) as reader:
+            for chunk in reader:
+                rows_read += len(chunk)
+                stats["warnings"].extend(_cast_chunk(chunk, dtypes))
+                chunk_stats = insert_data(chunk, table_name, table_columns_db=table_columns_db)
+                stats["chunks"] += 1
+                stats["method"] = chunk_stats["method"] or stats["method"]
+                for key in ("rows_inserted", "rows_failed", "batches", "failed_batches", "retries"):
+                    stats[key] += chunk_stats[key]
+                stats["errors"].extend(chunk_stats["errors"])
+                if on_progress:
+                    on_progress(stats)
+    except Exception as e:
+        error = f"Parsing stopped after {rows_read} rows: {e}"
+        print(f"❌ {error}")
+        stats["errors"].append(error)
+        stats["aborted"] = True
+
+    stats["seconds"] = time.time() - start_time
+    stats["rows_per_second"] = round(stats["rows_inserted"] / stats["seconds"], 1) if stats["seconds"] > 0 else 0.0
+    return stats
+
+# Drop a table created for an upload that could not be completed
+def drop_table(table_name: str) -> bool:
+    """Drops a table if it exists. Returns True on success, False otherwise."""
+    try:
+        get_backend().drop_table(table_name)
+        print(f"🗑️ Table `{table_name}` dropped.")
+        return True
     except Exception as e:
-        print(f"❌ Insert Error for `{table_name}`: {e}")
\ No newline at end of file
+        print(f"❌ SQL Execution Error (dropping {table_name}): {e}")
+        return False
@@ -1,41 +1,18 @@
 import time
 from fastapi import FastAPI
 
-# Import agents and database functions (assuming these are external and remain as is)
-from agents.schema_loader_agent import SchemaLoaderAgent
-
 from fastapi.middleware.cors import CORSMiddleware
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
 # --- Global State Management ---
-# This dictionary will hold the application's global state.
-# It's defined here and passed/accessed by routers as needed.
+# This dictionary holds the process-wide state shared by all requests.
+# Per-query outputs (steps, SQL, results, insights) live in the run store
+# (utils/run_store.py), keyed by the run id returned from /query-process.
 app_state = {
     "db_schema_string": None,
-    "last_query_processed": None, # This will store the original user query (English or Arabic)
-    "last_query_processed_english": None, # This will store the English version of the query
-    "last_query_processed_arabic": None, # This will store the Arabic version of the query (if applicable)
-    "processing_steps": [], # Log of steps for the last /query-process
-
-    # Detailed outputs from the last /query-process call for individual GET endpoints
-    "last_schema_loader_run": None,
-    "last_selector_agent_run": None,
-    "last_decomposer_agent_run": None,
-    "last_refiner_agent_run": None,
-    "last_db_execution_run": None,
-    "last_visualization_agent_run": None,
-
-    # Key data pieces often referenced
-    "last_sql_generated": None, # From Refiner
-    "last_result_df": None,     # From DB Execution
-    "current_summary_insights_eng": None, # English version of summary insights
-    "current_summary_insights_ar": None, # Arabic version of summary insights
-    "current_data_insights_eng": None,    # English version of detailed data insights
-    "current_data_insights_ar": None,    # Arabic version of detailed data insights
-    "last_suggested_visualization": "Table", # From Visualization
-    "last_decomposition": None # From Decomposer (if run)
+    "last_schema_loader_run": None, # Last schema load (startup, /query-process or upload)
 }
 
 # --- FastAPI App Initialization ---
@@ -57,31 +34,45 @@ app.add_middleware(
 )
 # --- Import and Include Routers ---
 # Import the APIRouter instances from the new files
-from routers import schema, upload, query_process, insights, downloads
+from routers import schema, upload, upload_jobs, query_process, insights, downloads, metrics, results
 
 # Include the routers in the main application
 app.include_router(schema.router)
 app.include_router(upload.router)
+app.include_router(upload_jobs.router)
 app.include_router(query_process.router)
 app.include_router(insights.router)
 app.include_router(downloads.router)
+app.include_router(metrics.router)
+app.include_router(results.router)
 
 
 # --- Startup Event Handler ---
+@app.on_event("startup")
+async def start_translator_session():
+    """
+    Opens the shared translator session used for language detection and translation.
+    """
+    from translation import start_translator_session as start_session
+    await start_session()
+
 @app.on_event("startup")
 async def load_initial_schema():
     """
     Loads the initial database schema when the FastAPI application starts up.
-    This populates the 'db_schema_string' and 'last_schema_loader_run' in the global app_state.
+    This populates the schema cache and the 'db_schema_string' and 'last_schema_loader_run' in the global app_state.
     """
     print("Loading initial database schema...")
     start_time = time.time()
     try:
-        # SchemaLoaderAgent is assumed to be an external dependency that remains as is.
-        schema_string, time_taken = SchemaLoaderAgent.load_schema_from_db()
+        # Loading through the schema cache lets /query-process reuse this schema instead of reloading it.
+        from utils.schema_cache import schema_cache, is_schema_error
+        schema_string, fingerprint, _, time_taken = schema_cache.get(force_refresh=True)
+        if is_schema_error(schema_string):
+            raise RuntimeError(schema_string)
         app_state["db_schema_string"] = schema_string
         status_msg = "✅ Schema loaded successfully from database on startup."
-        details = f"Schema loaded in {time_taken:.2f} seconds."
+        details = f"Schema loaded in {time_taken:.2f} seconds (fingerprint {fingerprint})."
         print(details)
         print(f"Schema: {schema_string[:200]}...")
         # Populate the last_schema_loader_run for the /schema endpoint
@@ -98,4 +89,28 @@ async def load_initial_schema():
             status="❌ Failed to load schema on startup", details=error_msg, schema_content=None, time_taken=time.time()-start_time
         )
 
+@app.on_event("shutdown")
+async def shutdown_agent_executor():
+    """
+    Releases the worker threads that blocking agent and database calls are offloaded to.
+    """
+    from utils.executor import shutdown_executor
+    shutdown_executor()
+
+@app.on_event("shutdown")
+async def shutdown_ingestion_jobs():
+    """
+    Stops the CSV ingestion worker pool. Queued jobs are marked failed and their spooled uploads deleted; running ones finish in the background.
+    """
+    from utils.ingestion_jobs import ingestion_jobs
+    ingestion_jobs.shutdown()
+
+@app.on_event("shutdown")
+async def close_translator_session():
+    """
+    Closes the shared translator session and its pooled HTTP connections.
+    """
+    from translation import close_translator_session as close_session
+    await close_session()
+
 # The rest of the endpoints are now defined in their respective router files.
\ No newline at end of file
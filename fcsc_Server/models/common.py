@@ -18,18 +18,56 @@ class AgentStep(BaseModel):
     status: str
     details: str | dict | list | None # Made more generic for various outputs
     time_taken: float
+    schema_source: str | None = None # "cached" or "fresh" for steps that consumed the database schema
+    cache_hit: bool | None = None # True if the step's output was served from a cache instead of being recomputed
 
 class QueryProcessResponse(BaseModel):
     """
     Represents the comprehensive response from the /query-process endpoint,
     detailing the entire natural language to SQL conversion and execution flow.
     """
+    run_id: str | None = None # Pass to the follow-up GET endpoints to read this run's outputs
     original_query: str # User's original query (could be Arabic)
     sql_query: str | None
-    result_data: list[dict] | None
+    result_data: list[dict] | None # First page of the result; fetch the rest from /results/{run_id}
+    total_rows: int | None = None # Rows in the stored result (at most RESULT_ROW_CAP)
+    truncated: bool = False # True if the query returned more than RESULT_ROW_CAP rows
     suggested_visualization: str | None
     summary_insights: str | None # Renamed for clarity, will be in Arabic if original query was Arabic
     data_insights: str | None    # Added new field, will be in Arabic if original query was Arabic
     processing_steps: list[AgentStep] # Use AgentStep model here
     total_time_seconds: float
     error: str | None
+
+class ResultPage(BaseModel):
+    """
+    Represents one page of the stored result of a /query-process run.
+    """
+    run_id: str
+    offset: int
+    limit: int
+    total_rows: int
+    truncated: bool # True if the query returned more than RESULT_ROW_CAP rows
+    columns: list[str]
+    rows: list[dict]
+
+class IngestionJob(BaseModel):
+    """
+    Represents the progress of a CSV ingestion job started by /upload-csv.
+    """
+    job_id: str
+    filename: str
+    table_name: str
+    phase: str # queued, parsing, creating_table, inserting, refreshing_schema, then completed, failed or skipped
+    message: str
+    rows_ingested: int
+    rows_failed: int
+    chunks: int
+    rows_per_second: float
+    elapsed_seconds: float
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    errors: List[str]
+    ingestion: Optional[Dict[str, Any]] = None # Final insert statistics
+    processing_steps: List[AgentStep]
@@ -5,7 +5,8 @@ from starlette.responses import StreamingResponse
 from io import StringIO, BytesIO
 from typing import Optional
 
-from main import app_state # Import the global app_state
+from utils.run_store import resolve_run
+from utils.insight_translation import require_arabic_insight
 
 # Assuming these PDF generators are external and remain as is.
 from pdf_v2 import PDFReportGenerator
@@ -18,14 +19,16 @@ router = APIRouter(
 )
 
 @router.get("/generate-pdf/{lang}", summary="Generate PDF Report")
-async def generate_pdf_report_endpoint(lang :Optional[str] = "eng"): # Renamed to avoid conflict
+async def generate_pdf_report_endpoint(lang :Optional[str] = "eng", run_id: Optional[str] = None): # Renamed to avoid conflict
     """
     Generates a PDF report based on the last successfully processed query, SQL, and results.
     The report language (English or Arabic) can be specified via the 'lang' path parameter.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    # Check if necessary data exists in app_state
-    # Crucially, app_state["last_result_df"] should be a pandas DataFrame
-    if app_state["last_result_df"] is None: # This now correctly checks for the DataFrame
+    # Check if necessary data exists in the run
+    # Crucially, run["last_result_df"] should be a pandas DataFrame
+    run = resolve_run(run_id)
+    if run is None or run["last_result_df"] is None: # This now correctly checks for the DataFrame
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, # 409 Conflict: request cannot be processed in current state
             detail="No result DataFrame available to generate PDF. Run /query-process successfully first."
@@ -33,11 +36,12 @@ async def generate_pdf_report_endpoint(lang :Optional[str] = "eng"): # Renamed t
 
     # Determine which query and insights to use based on 'lang'
     if lang.lower() == "arabic":
-        query_for_pdf = app_state["last_query_processed_arabic"] if app_state["last_query_processed_arabic"] else app_state["last_query_processed_english"]
-        summary_insights_for_pdf = app_state["current_summary_insights_ar"] if app_state["current_summary_insights_ar"] else "No specific insights generated for this query."
+        query_for_pdf = run["last_query_processed_arabic"] if run["last_query_processed_arabic"] else run["last_query_processed_english"]
+        summary_insights_ar = await require_arabic_insight(run, "current_summary_insights_eng")
+        summary_insights_for_pdf = summary_insights_ar if summary_insights_ar else "No specific insights generated for this query."
     else: # Default to English
-        query_for_pdf = app_state["last_query_processed_english"]
-        summary_insights_for_pdf = app_state["current_summary_insights_eng"] if app_state["current_summary_insights_eng"] else "No specific insights generated for this query."
+        query_for_pdf = run["last_query_processed_english"]
+        summary_insights_for_pdf = run["current_summary_insights_eng"] if run["current_summary_insights_eng"] else "No specific insights generated for this query."
 
 
     if query_for_pdf is None:
@@ -46,7 +50,7 @@ async def generate_pdf_report_endpoint(lang :Optional[str] = "eng"): # Renamed t
             detail="Original query (English or Arabic version) not found. Run /query-process first."
         )
 
-    if app_state["last_sql_generated"] is None:
+    if run["last_sql_generated"] is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="SQL query not found. Run /query-process first."
@@ -54,26 +58,26 @@ async def generate_pdf_report_endpoint(lang :Optional[str] = "eng"): # Renamed t
 
     try:
         # Ensure last_result_df is a DataFrame before passing
-        if not isinstance(app_state["last_result_df"], pd.DataFrame):
-            print(f"Error: last_result_df is not a DataFrame, but type: {type(app_state['last_result_df'])}")
+        if not isinstance(run["last_result_df"], pd.DataFrame):
+            print(f"Error: last_result_df is not a DataFrame, but type: {type(run['last_result_df'])}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal error: Result data is not in the expected format (DataFrame).")
 
-        if app_state["last_result_df"].empty:
+        if run["last_result_df"].empty:
             summary_insights_for_pdf = "Query executed successfully but returned no data. " + summary_insights_for_pdf
 
         if lang.lower() == "arabic":
             pdf_bytes_content = ArabicPDFReportGenerator.generate_report( # Assuming external generator
                 query=query_for_pdf, # Pass the appropriate language query
-                sql_query=app_state["last_sql_generated"],
-                result_df=app_state["last_result_df"],
+                sql_query=run["last_sql_generated"],
+                result_df=run["last_result_df"],
                 summary=summary_insights_for_pdf, # Pass the appropriate language summary insights
                 output_path=None
             )
         else:
             pdf_bytes_content = PDFReportGenerator.generate_report( # Assuming external generator
                 query=query_for_pdf, # Pass the appropriate language query
-                sql_query=app_state["last_sql_generated"],
-                result_df=app_state["last_result_df"],
+                sql_query=run["last_sql_generated"],
+                result_df=run["last_result_df"],
                 summary=summary_insights_for_pdf, # Pass the appropriate language summary insights
                 output_path=None
             )
@@ -97,12 +101,14 @@ async def generate_pdf_report_endpoint(lang :Optional[str] = "eng"): # Renamed t
 
 
 @router.get("/csv", tags=["Download-CSV"], summary="Download Last Query Result as CSV")
-async def download_csv():
+async def download_csv(run_id: Optional[str] = None):
     """
-    Downloads the result of the last processed query as a CSV file.
+    Downloads the result of a processed query as a CSV file.
     Requires a query to have been processed successfully via /query-process.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_result_df"] is None or app_state["last_result_df"].empty:
+    run = resolve_run(run_id)
+    if run is None or run["last_result_df"] is None or run["last_result_df"].empty:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="No data available from the last query to download as CSV. Please run /query-process first."
@@ -110,7 +116,7 @@ async def download_csv():
 
     try:
         csv_buffer = StringIO()
-        app_state["last_result_df"].to_csv(csv_buffer, index=False, encoding='utf-8')
+        run["last_result_df"].to_csv(csv_buffer, index=False, encoding='utf-8')
         csv_buffer.seek(0) # Rewind the buffer to the beginning
 
         file_name = f"query_result_{int(time.time())}.csv"
@@ -126,12 +132,14 @@ async def download_csv():
 
 
 @router.get("/excel", tags=["Download-Excel"], summary="Download Last Query Result as Excel")
-async def download_excel():
+async def download_excel(run_id: Optional[str] = None):
     """
-    Downloads the result of the last processed query as an Excel (XLSX) file.
+    Downloads the result of a processed query as an Excel (XLSX) file.
     Requires a query to have been processed successfully via /query-process.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_result_df"] is None or app_state["last_result_df"].empty:
+    run = resolve_run(run_id)
+    if run is None or run["last_result_df"] is None or run["last_result_df"].empty:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="No data available from the last query to download as Excel. Please run /query-process first."
@@ -141,7 +149,7 @@ async def download_excel():
         excel_buffer = BytesIO()
         # Ensure 'openpyxl' is installed for .xlsx support if not already.
         # pip install openpyxl
-        app_state["last_result_df"].to_excel(excel_buffer, index=False, engine='openpyxl')
+        run["last_result_df"].to_excel(excel_buffer, index=False, engine='openpyxl')
         excel_buffer.seek(0) # Rewind the buffer to the beginning
 
         file_name = f"query_result_{int(time.time())}.xlsx"
@@ -0,0 +1,73 @@
+from fastapi import APIRouter
+
+from utils.llm_client import llm_registry
+from utils.run_store import run_store
+from utils.schema_cache import schema_cache
+from utils.query_cache import query_cache
+from utils.result_cache import result_cache
+from utils.speculation import speculation_stats
+from utils.translation_cache import translation_cache
+from utils.ingestion_jobs import ingestion_jobs
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=['Metrics']
+)
+
+@router.get("/llm-clients", summary="Get LLM Client Pool Statistics")
+async def get_llm_client_stats():
+    """
+    Returns statistics for the shared LLM client registry: live clients and, per model id,
+    how many clients were created and how many agent calls reused an existing client.
+    """
+    return llm_registry.stats()
+
+@router.get("/run-store", summary="Get Run Store Statistics")
+async def get_run_store_stats():
+    """
+    Returns occupancy (runs and estimated bytes) and eviction counters of the per-request run store.
+    """
+    return run_store.stats()
+
+@router.get("/schema-cache", summary="Get Schema Cache Statistics")
+async def get_schema_cache_stats():
+    """
+    Returns the current schema fingerprint, its age, and cache hit/load/invalidation counters.
+    """
+    return schema_cache.stats()
+
+@router.get("/query-cache", summary="Get NL to SQL Answer Cache Statistics")
+async def get_query_cache_stats():
+    """
+    Returns hit/miss counters and occupancy of the answer cache in front of the Selector, Decomposer and Refiner.
+    """
+    return query_cache.stats()
+
+@router.get("/result-cache", summary="Get SQL Result Cache Statistics")
+async def get_result_cache_stats():
+    """
+    Returns hit/miss counters, occupancy (entries and bytes) and evictions of the SQL result cache.
+    """
+    return result_cache.stats()
+
+@router.get("/speculation", summary="Get Speculative SQL Generation Statistics")
+async def get_speculation_stats():
+    """
+    Returns how often the SQL generated speculatively alongside the Selector was used (hit)
+    or discarded because the query was not answerable or needed decomposition (miss).
+    """
+    return speculation_stats.stats()
+
+@router.get("/translation-cache", summary="Get Translation Cache Statistics")
+async def get_translation_cache_stats():
+    """
+    Returns memory and disk hit/miss counters and occupancy of the two-tier translation cache.
+    """
+    return translation_cache.stats()
+
+@router.get("/ingestion-jobs", summary="Get CSV Ingestion Job Statistics")
+async def get_ingestion_job_stats():
+    """
+    Returns the ingestion worker pool size and how many retained jobs are in each phase.
+    """
+    return ingestion_jobs.stats()
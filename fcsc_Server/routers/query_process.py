@@ -1,26 +1,52 @@
 import time
 import pandas as pd
 import sqlparse # For formatting SQL output
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import Optional
+import json
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import StreamingResponse, Response
+from typing import Optional, Dict, Any, Callable
 
 from main import app_state # Import the global app_state
+from utils.run_store import run_store, resolve_run
+from utils.schema_cache import schema_cache, is_schema_error
+from utils.schema_retrieval import select_relevant_schema
+from utils.query_cache import query_cache
+from utils.result_cache import result_cache
+from utils.speculation import speculation_stats, SPECULATIVE_SQL_GENERATION
+from utils.sql_validator import validate_sql, SQL_VALIDATION_ENABLED
+from utils.cost_guard import (
+    COST_GUARD_ENABLED, COST_GUARD_ACTION, COST_GUARD_LIMIT_ROWS,
+    estimate_sql_cost, summarize_cost_report, limit_sql_query, regeneration_feedback
+)
 from models.common import QueryInput, QueryProcessResponse
 from models.agents import (
     SchemaLoaderResponse, SelectorAgentResponse, DecomposerAgentResponse,
     RefinerAgentResponse, DatabaseExecutionResponse, VisualizationAgentResponse
 )
 from utils.processing_steps import _add_processing_step
+from utils.deadlines import (
+    run_stage, run_until_disconnected, with_deadline, ClientDisconnectedError, StageTimeoutError,
+    LLM_STAGE_TIMEOUT_SECONDS, DB_STAGE_TIMEOUT_SECONDS, PIPELINE_TIMEOUT_SECONDS, DISCONNECT_POLL_SECONDS
+)
 
 # Assuming these agents and database functions are external and remain as is.
-from agents.schema_loader_agent import SchemaLoaderAgent
 from agents.selector_agent import SelectorAgent
 from agents.decomposer_agent import DecomposerAgent
+from agents.selector_decomposer_agent import SelectorDecomposerAgent
 from agents.refiner_agent import RefinerAgent
 from agents.visualization_agent_3 import VisualizationAgent
 from database import execute_sql_query_db, get_database_schema_string
-from translation import detect_languages, translate_text_to_eng, translate_text_to_ar
+from translation import detect_languages, translate_text_to_eng
+from utils.insight_translation import translate_all_insights
+from routers.results import RESULT_PAGE_SIZE
 import asyncio # Required for async translation functions
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+# When true, the Selector and Decomposer run as a single structured LLM call
+COMBINED_SELECTOR_DECOMPOSER = os.getenv("COMBINED_SELECTOR_DECOMPOSER", "false").lower() == "true"
 
 
 router = APIRouter(
@@ -28,41 +54,104 @@ router = APIRouter(
     tags=['Query-Process']
 )
 
-@router.post("/query-process/{lang}", summary="Process Natural Language Query", response_model=QueryProcessResponse)
-async def process_query(query_input: QueryInput, lang:str="english"):
+# Number of result rows sent in the "rows" event of /query-process-stream before the final payload
+STREAM_PREVIEW_ROWS = int(os.getenv("STREAM_PREVIEW_ROWS", "50"))
+
+
+async def _discard_speculative_sql(task: asyncio.Future, reason: str):
     """
-    Processes a natural language query through a series of agents (Schema Loader, Selector, Decomposer, Refiner,
-    Database Execution, Visualization) to generate SQL, execute it, and provide insights.
-    Supports language detection and translation for Arabic queries.
+    Cancels a speculative Refiner task, waits for it to finish (so its exception is retrieved)
+    and counts the miss.
+    """
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    speculation_stats.record_miss(reason)
+
+
+async def _apply_cost_guard(run: Dict[str, Any], sql_query: str, query_for_agents: str, prompt_schema_string: str, db_schema_string: str) -> str:
+    """
+    Checks the EXPLAIN estimates of the SQL about to run against the cost guard thresholds and
+    applies COST_GUARD_ACTION when they are exceeded. Each decision is recorded as a "Cost Guard" step.
+
+    Returns:
+        str: The SQL to execute (possibly wrapped in a LIMIT or regenerated).
+
+    Raises:
+        ValueError: If the query is rejected, or its regenerated version is still over budget.
     """
+    report, guard_time = await run_stage("Cost Guard", DB_STAGE_TIMEOUT_SECONDS, estimate_sql_cost, sql_query)
+    details = summarize_cost_report(report)
+    if not report["available"]:
+        _add_processing_step(run, "Cost Guard", "ℹ️ Cost check skipped", details, guard_time)
+        return sql_query
+    if not report["violations"]:
+        _add_processing_step(run, "Cost Guard", "✅ Within cost budget", details, guard_time)
+        return sql_query
+
+    if COST_GUARD_ACTION == "limit":
+        _add_processing_step(run, "Cost Guard", f"⚠️ Over cost budget, LIMIT {COST_GUARD_LIMIT_ROWS} applied", details, guard_time)
+        limited_sql = limit_sql_query(sql_query)
+        run["last_sql_generated"] = limited_sql # /results/{run_id}/stream re-runs this SQL, so it must stay limited too
+        return limited_sql
+
+    if COST_GUARD_ACTION == "regenerate":
+        _add_processing_step(run, "Cost Guard", "⚠️ Over cost budget, regenerating SQL", details, guard_time)
+        regenerated_sql, refiner_time = await run_stage("Refiner Agent", LLM_STAGE_TIMEOUT_SECONDS, RefinerAgent.generate_sql, regeneration_feedback(query_for_agents, report), prompt_schema_string, run["last_decomposition"])
+        if not regenerated_sql or "Error" in regenerated_sql or "SELECT" not in regenerated_sql.upper():
+            _add_processing_step(run, "Refiner Agent (Regenerated)", "❌ SQL regeneration failed", regenerated_sql, refiner_time)
+            raise ValueError(f"SQL regeneration after cost guard failed: {regenerated_sql}")
+        _add_processing_step(run, "Refiner Agent (Regenerated)", "✅ Cheaper SQL requested and generated", regenerated_sql, refiner_time)
+        if SQL_VALIDATION_ENABLED:
+            sql_valid, validation_errors, validation_time = validate_sql(regenerated_sql, db_schema_string)
+            if not sql_valid:
+                _add_processing_step(run, "SQL Validator", "❌ SQL validation failed", validation_errors, validation_time)
+                raise ValueError(f"SQL validation failed: {' '.join(validation_errors)}")
+        report, guard_time = await run_stage("Cost Guard", DB_STAGE_TIMEOUT_SECONDS, estimate_sql_cost, regenerated_sql)
+        details = summarize_cost_report(report)
+        if report["violations"]:
+            _add_processing_step(run, "Cost Guard", "❌ Regenerated query still over cost budget", details, guard_time)
+            raise ValueError(f"Query rejected by cost guard: {'; '.join(report['violations'])}")
+        _add_processing_step(run, "Cost Guard", "✅ Regenerated SQL within cost budget", details, guard_time)
+        run["last_sql_generated"] = regenerated_sql
+        run["last_refiner_agent_run"] = RefinerAgentResponse(status="✅ SQL regenerated by cost guard", details=regenerated_sql, time_taken=refiner_time)
+        return regenerated_sql
+
+    _add_processing_step(run, "Cost Guard", "❌ Query rejected (over cost budget)", details, guard_time)
+    raise ValueError(f"Query rejected by cost guard: {'; '.join(report['violations'])}")
+
+
+async def _run_query_pipeline(run: Dict[str, Any], lang: str, emit: Optional[Callable[[str, Any], None]] = None) -> QueryProcessResponse:
+    """
+    Runs a query through the agent pipeline (Schema Loader, Selector, Decomposer, Refiner,
+    Database Execution, Visualization) and fills in the run state.
+
+    Args:
+        run (Dict[str, Any]): The run state created by run_store.create().
+        lang (str): "arabic" to return Arabic insights, anything else for English.
+        emit (Optional[Callable[[str, Any], None]]): Called with ("sql", ...), ("rows", ...) and
+            ("insights", ...) as soon as each is available. Used by /query-process-stream.
+
+    Returns:
+        QueryProcessResponse: The full response, identical for the plain and the streaming endpoint.
+    """
+    def _emit(event: str, data: Any):
+        if emit is not None:
+            emit(event, data)
+
     overall_start_time = time.time()
-    # Reset states for the new query
-    app_state["processing_steps"] = []
-    app_state["last_query_processed"] = query_input.query # Store original user query
-    app_state["last_query_processed_english"] = None # Will store English version
-    app_state["last_query_processed_arabic"] = None # Will store Arabic version (if applicable)
-    app_state["last_sql_generated"] = None
-    app_state["last_result_df"] = None
-    app_state["current_summary_insights_eng"] = None # Reset summary insights
-    app_state["current_summary_insights_ar"] = None
-    app_state["current_data_insights_eng"] = None    # Reset data insights
-    app_state["current_data_insights_ar"] = None
-    app_state["last_suggested_visualization"] = "Table"
-    app_state["last_decomposition"] = None
-    app_state["last_selector_agent_run"] = None
-    app_state["last_decomposer_agent_run"] = None
-    app_state["last_refiner_agent_run"] = None
-    app_state["last_db_execution_run"] = None
-    app_state["last_visualization_agent_run"] = None
-
-    original_query = query_input.query
+
+    original_query = run["last_query_processed"]
     query_for_agents = original_query # This will be the English version used by agents
     sql_query_final = None
     result_data_final = None
+    total_rows_final = None
+    truncated_final = False
     suggested_visualization_final = "Table"
     summary_insights_final = None # Will store summary insights (translated to Arabic if needed)
     data_insights_final = None    # Will store detailed data insights (translated to Arabic if needed)
     error_final = None
+    speculative_sql_task = None
+    speculative_sql_used = False
 
     detected_lang = 'en' # Default to English
 
@@ -71,241 +160,455 @@ async def process_query(query_input: QueryInput, lang:str="english"):
         lang_detect_start = time.time()
         detected_lang = await detect_languages(original_query) # Assuming external translation function
         lang_detect_time = time.time() - lang_detect_start
-        # _add_processing_step(app_state, "Language Detection", "✅ Language detected", f"Detected language: {detected_lang}", lang_detect_time)
+        # _add_processing_step(run, "Language Detection", "✅ Language detected", f"Detected language: {detected_lang}", lang_detect_time)
 
         if detected_lang == 'ar':
             translation_start = time.time()
             query_for_agents = await translate_text_to_eng(original_query) # Assuming external translation function
-            app_state["last_query_processed_arabic"] = original_query # Store Arabic original
+            run["last_query_processed_arabic"] = original_query # Store Arabic original
             translation_time = time.time() - translation_start
-            # _add_processing_step(app_state, "Translation (Arabic to English)", "✅ Query translated", f"Original: '{original_query}' -> English: '{query_for_agents}'", translation_time)
+            # _add_processing_step(run, "Translation (Arabic to English)", "✅ Query translated", f"Original: '{original_query}' -> English: '{query_for_agents}'", translation_time)
         else:
-            app_state["last_query_processed_arabic"] = None # No Arabic version if not detected as Arabic
-            # _add_processing_step(app_state, "Translation", "ℹ️ No translation needed", "Query is already in English or not Arabic.", 0.0)
+            run["last_query_processed_arabic"] = None # No Arabic version if not detected as Arabic
+            # _add_processing_step(run, "Translation", "ℹ️ No translation needed", "Query is already in English or not Arabic.", 0.0)
 
-        app_state["last_query_processed_english"] = query_for_agents # Store English version for agents
+        run["last_query_processed_english"] = query_for_agents # Store English version for agents
 
-        # 1. Schema Loader Agent
+        # 1. Schema Loader Agent (served from the schema cache unless stale or invalidated)
         schema_start_time = time.time()
-        db_schema_string, schema_load_time = SchemaLoaderAgent.load_schema_from_db() # Assuming external agent
-        app_state["db_schema_string"] = db_schema_string # Update global schema
-        schema_status = "✅ Schema loaded from database"
-        schema_details = f"Database schema (length {len(db_schema_string)}) available."
-        if "Error" in db_schema_string or not db_schema_string:
+        db_schema_string, schema_fingerprint, schema_cached, schema_load_time = await run_stage("Schema Loader", DB_STAGE_TIMEOUT_SECONDS, schema_cache.get)
+        schema_source = "cached" if schema_cached else "fresh"
+        run["schema_fingerprint"] = schema_fingerprint
+        schema_status = "✅ Schema served from cache" if schema_cached else "✅ Schema loaded from database"
+        schema_details = f"Database schema (length {len(db_schema_string)}, fingerprint {schema_fingerprint}) available."
+        prompt_schema_string = db_schema_string # Schema given to the LLM agents; narrowed by retrieval below
+        if is_schema_error(db_schema_string):
             schema_status = "❌ Failed to load schema or schema is empty"
             schema_details = db_schema_string
-        step1 = _add_processing_step(app_state, "Schema Loader", schema_status, schema_details, schema_load_time)
-        app_state["last_schema_loader_run"] = SchemaLoaderResponse(
-            status=step1.status, details=step1.details, schema_content=db_schema_string if "Error" not in db_schema_string else None, time_taken=step1.time_taken
+        else:
+            # Keep only the tables relevant to this query in the agent prompts (falls back to the full schema)
+            prompt_schema_string, retrieval_report = select_relevant_schema(query_for_agents, db_schema_string, schema_fingerprint)
+            run["schema_retrieval"] = retrieval_report
+            schema_details += f" Retrieval: {retrieval_report['reason']} Prompt schema ~{retrieval_report['prompt_schema_tokens']} tokens (saved ~{retrieval_report['tokens_saved']})."
+        step1 = _add_processing_step(run, "Schema Loader", schema_status, schema_details, schema_load_time, schema_source=schema_source)
+        run["last_schema_loader_run"] = SchemaLoaderResponse(
+            status=step1.status, details=step1.details, schema_content=db_schema_string if not is_schema_error(db_schema_string) else None, time_taken=step1.time_taken
         )
-        if "Error" in db_schema_string or not db_schema_string:
+        if is_schema_error(db_schema_string):
             raise ValueError(f"Schema not loaded or empty: {db_schema_string}")
+        if not schema_cached:
+            app_state["db_schema_string"] = db_schema_string # Update global schema
+            app_state["last_schema_loader_run"] = run["last_schema_loader_run"]
+
+        # 2-4. NL -> SQL answer cache: a repeated question on the same schema skips straight to execution
+        cached_answer = query_cache.get(query_for_agents, schema_fingerprint)
+        if cached_answer is not None:
+            answerable = True
+            explanation = cached_answer["explanation"]
+            needs_decomposition = cached_answer["needs_decomposition"]
+            selector_details_dict = {"answerable": True, "explanation": explanation, "needs_decomposition": needs_decomposition}
+            step2 = _add_processing_step(run, "Selector Agent", "⚡ Cache hit", selector_details_dict, 0.0, cache_hit=True)
+            run["last_selector_agent_run"] = SelectorAgentResponse(status=step2.status, details=step2.details, time_taken=step2.time_taken)
+
+            if needs_decomposition:
+                run["last_decomposition"] = cached_answer["decomposition"]
+                step3 = _add_processing_step(run, "Decomposer Agent", "⚡ Cache hit", cached_answer["decomposition"], 0.0, cache_hit=True)
+                run["last_decomposer_agent_run"] = DecomposerAgentResponse(status=step3.status, details=step3.details, time_taken=step3.time_taken)
+            else:
+                _add_processing_step(run, "Decomposer Agent", "ℹ️ Skipped", "Decomposition not deemed necessary by Selector Agent.", 0.0, cache_hit=True)
+                run["last_decomposer_agent_run"] = DecomposerAgentResponse(status="ℹ️ Skipped", details="Decomposition not deemed necessary.", time_taken=0.0)
 
-        # 2. Selector Agent
-        selector_start_time = time.time()
-        answerable, explanation, needs_decomposition, selector_time = SelectorAgent.is_query_answerable(query_for_agents, db_schema_string) # Assuming external agent
-        selector_status = "✅ Query deemed answerable" if answerable else "⚠️ Query potentially not answerable"
-        selector_details_dict = {"answerable": answerable, "explanation": explanation, "needs_decomposition": needs_decomposition}
-        step2 = _add_processing_step(app_state, "Selector Agent", selector_status, selector_details_dict, selector_time)
-        app_state["last_selector_agent_run"] = SelectorAgentResponse(status=step2.status, details=step2.details, time_taken=step2.time_taken)
-
-        if not answerable:
-            print(f"Warning: Selector Agent indicated query might not be answerable. Explanation: {explanation}")
-            error_final = f"Query not answerable: {explanation}"
-            overall_time_seconds = time.time() - overall_start_time
-            return QueryProcessResponse(
-                original_query=original_query,
-                sql_query=None,
-                result_data=None,
-                suggested_visualization=None,
-                summary_insights=None,
-                data_insights=None,
-                processing_steps=app_state["processing_steps"], # Only schema loader and selector will be here
-                total_time_seconds=overall_time_seconds,
-                error=error_final
-            )
-
-        # 3. Decomposer Agent (Conditional)
-        decomposition_result = None
-        if needs_decomposition:
-            decomposer_start_time = time.time()
-            decomposition_result, decomposer_time = DecomposerAgent.decompose_query(query_for_agents, db_schema_string) # Assuming external agent
-            app_state["last_decomposition"] = decomposition_result
-            decomposer_status = "✅ Query decomposed"
-            if isinstance(decomposition_result, str) and "Error" in decomposition_result:
-                decomposer_status = "❌ Decomposition failed"
-            step3 = _add_processing_step(app_state, "Decomposer Agent", decomposer_status, decomposition_result, decomposer_time)
-            app_state["last_decomposer_agent_run"] = DecomposerAgentResponse(status=step3.status, details=step3.details, time_taken=step3.time_taken)
-            if decomposer_status == "❌ Decomposition failed":
-                raise ValueError(f"Decomposition failed: {decomposition_result}")
-        else:
-            _add_processing_step(app_state, "Decomposer Agent", "ℹ️ Skipped", "Decomposition not deemed necessary by Selector Agent.", 0.0)
-            app_state["last_decomposer_agent_run"] = DecomposerAgentResponse(status="ℹ️ Skipped", details="Decomposition not deemed necessary.", time_taken=0.0)
-
-
-        # 4. Refiner Agent
-        refiner_start_time = time.time()
-        generated_sql, refiner_time = RefinerAgent.generate_sql(query_for_agents, db_schema_string, app_state["last_decomposition"]) # Assuming external agent
-        app_state["last_sql_generated"] = generated_sql
-        sql_query_final = generated_sql # for response
-        refiner_status = "✅ SQL generated"
-        formatted_sql = generated_sql
-        if not generated_sql or "Error" in generated_sql or "SELECT" not in generated_sql.upper(): # Basic check
-            refiner_status = "❌ SQL generation failed or invalid"
+            run["last_sql_generated"] = cached_answer["sql"]
+            sql_query_final = cached_answer["sql"]
+            step4 = _add_processing_step(run, "Refiner Agent", "⚡ Cache hit", sql_query_final, 0.0, cache_hit=True)
+            run["last_refiner_agent_run"] = RefinerAgentResponse(status=step4.status, details=sql_query_final, time_taken=step4.time_taken)
         else:
+            # Speculative mode: start generating SQL without decomposition while the Selector runs.
+            # Most queries are answerable and simple, so this takes one LLM latency off the critical path.
+            if SPECULATIVE_SQL_GENERATION:
+                speculative_sql_task = asyncio.ensure_future(run_stage("Refiner Agent (speculative)", LLM_STAGE_TIMEOUT_SECONDS, RefinerAgent.generate_sql, query_for_agents, prompt_schema_string, None))
+
+            # 2. Selector Agent (in combined mode the same LLM call also returns the decomposition)
+            selector_start_time = time.time()
+            combined_decomposition = None
+            selector_ok = False
             try:
-                formatted_sql = sqlparse.format(generated_sql, reindent=True, keyword_case='upper')
-            except Exception:
-                formatted_sql = generated_sql # Keep original if formatting fails
+                if COMBINED_SELECTOR_DECOMPOSER:
+                    answerable, explanation, needs_decomposition, combined_decomposition, selector_time = await run_stage("Selector Agent", LLM_STAGE_TIMEOUT_SECONDS, SelectorDecomposerAgent.evaluate_and_decompose, query_for_agents, prompt_schema_string)
+                else:
+                    answerable, explanation, needs_decomposition, selector_time = await run_stage("Selector Agent", LLM_STAGE_TIMEOUT_SECONDS, SelectorAgent.is_query_answerable, query_for_agents, prompt_schema_string)
+                selector_ok = True
+            finally:
+                if speculative_sql_task is not None and (not selector_ok or not answerable or needs_decomposition):
+                    # The Selector failed, or the speculative SQL answers the wrong question; drop it
+                    reason = "failed" if not selector_ok else ("not_answerable" if not answerable else "needs_decomposition")
+                    await _discard_speculative_sql(speculative_sql_task, reason)
+                    speculative_sql_task = None
+            selector_status = "✅ Query deemed answerable" if answerable else "⚠️ Query potentially not answerable"
+            selector_details_dict = {"answerable": answerable, "explanation": explanation, "needs_decomposition": needs_decomposition}
+            step2 = _add_processing_step(run, "Selector Agent", selector_status, selector_details_dict, selector_time, schema_source=schema_source)
+            run["last_selector_agent_run"] = SelectorAgentResponse(status=step2.status, details=step2.details, time_taken=step2.time_taken)
+
+            if not answerable:
+                print(f"Warning: Selector Agent indicated query might not be answerable. Explanation: {explanation}")
+                error_final = f"Query not answerable: {explanation}"
+                overall_time_seconds = time.time() - overall_start_time
+                run_store.save(run)
+                return QueryProcessResponse(
+                    run_id=run["run_id"],
+                    original_query=original_query,
+                    sql_query=None,
+                    result_data=None,
+                    suggested_visualization=None,
+                    summary_insights=None,
+                    data_insights=None,
+                    processing_steps=run["processing_steps"], # Only schema loader and selector will be here
+                    total_time_seconds=overall_time_seconds,
+                    error=error_final
+                )
+
+            # 3. Decomposer Agent (Conditional)
+            decomposition_result = None
+            if needs_decomposition:
+                decomposer_start_time = time.time()
+                if isinstance(combined_decomposition, dict) and combined_decomposition:
+                    # Already produced by the combined Selector call; no second LLM round-trip
+                    decomposition_result, decomposer_time = combined_decomposition, 0.0
+                    decomposer_status = "✅ Query decomposed (combined with Selector call)"
+                else:
+                    decomposition_result, decomposer_time = await run_stage("Decomposer Agent", LLM_STAGE_TIMEOUT_SECONDS, DecomposerAgent.decompose_query, query_for_agents, prompt_schema_string)
+                    decomposer_status = "✅ Query decomposed"
+                run["last_decomposition"] = decomposition_result
+                if isinstance(decomposition_result, str) and "Error" in decomposition_result:
+                    decomposer_status = "❌ Decomposition failed"
+                step3 = _add_processing_step(run, "Decomposer Agent", decomposer_status, decomposition_result, decomposer_time, schema_source=schema_source)
+                run["last_decomposer_agent_run"] = DecomposerAgentResponse(status=step3.status, details=step3.details, time_taken=step3.time_taken)
+                if decomposer_status == "❌ Decomposition failed":
+                    raise ValueError(f"Decomposition failed: {decomposition_result}")
+            else:
+                _add_processing_step(run, "Decomposer Agent", "ℹ️ Skipped", "Decomposition not deemed necessary by Selector Agent.", 0.0)
+                run["last_decomposer_agent_run"] = DecomposerAgentResponse(status="ℹ️ Skipped", details="Decomposition not deemed necessary.", time_taken=0.0)
+
+
+            # 4. Refiner Agent
+            refiner_start_time = time.time()
+            if speculative_sql_task is not None:
+                # Speculation hit: reuse the SQL generated alongside the Selector
+                generated_sql, refiner_time = await speculative_sql_task
+                speculative_sql_used = True
+                speculation_stats.record_hit()
+            else:
+                generated_sql, refiner_time = await run_stage("Refiner Agent", LLM_STAGE_TIMEOUT_SECONDS, RefinerAgent.generate_sql, query_for_agents, prompt_schema_string, run["last_decomposition"])
+            run["last_sql_generated"] = generated_sql
+            sql_query_final = generated_sql # for response
+            sql_generated_ok = True
+            refiner_status = "✅ SQL generated (speculative, overlapped with Selector)" if speculative_sql_task is not None else "✅ SQL generated"
+            formatted_sql = generated_sql
+            if not generated_sql or "Error" in generated_sql or "SELECT" not in generated_sql.upper(): # Basic check
+                sql_generated_ok = False
+                refiner_status = "❌ SQL generation failed or invalid"
+            else:
+                try:
+                    formatted_sql = sqlparse.format(generated_sql, reindent=True, keyword_case='upper')
+                except Exception:
+                    formatted_sql = generated_sql # Keep original if formatting fails
+
+            step4 = _add_processing_step(run, "Refiner Agent", refiner_status, formatted_sql, refiner_time, schema_source=schema_source)
+            run["last_refiner_agent_run"] = RefinerAgentResponse(status=step4.status, details=formatted_sql if sql_generated_ok else generated_sql, time_taken=step4.time_taken)
+            if not sql_generated_ok:
+                raise ValueError(f"SQL generation failed: {generated_sql}")
+
+        # 4b. Static SQL validation against the cached schema: bad SQL fails locally instead of after a database round-trip
+        if SQL_VALIDATION_ENABLED:
+            sql_valid, validation_errors, validation_time = validate_sql(sql_query_final, db_schema_string)
+            if sql_valid:
+                _add_processing_step(run, "SQL Validator", "✅ SQL validated", "Read-only query; all referenced tables and columns exist.", validation_time, schema_source=schema_source)
+            else:
+                _add_processing_step(run, "SQL Validator", "❌ SQL validation failed", validation_errors, validation_time, schema_source=schema_source)
+                raise ValueError(f"SQL validation failed: {' '.join(validation_errors)}")
 
-        step4 = _add_processing_step(app_state, "Refiner Agent", refiner_status, formatted_sql, refiner_time)
-        app_state["last_refiner_agent_run"] = RefinerAgentResponse(status=step4.status, details=formatted_sql if refiner_status == "✅ SQL generated" else generated_sql, time_taken=step4.time_taken)
-        if refiner_status != "✅ SQL generated":
-            raise ValueError(f"SQL generation failed: {generated_sql}")
+        # 4c. Optional EXPLAIN-based cost guard: reject, LIMIT or regenerate runaway queries before they run
+        sql_query_cacheable = sql_query_final # What the query cache stores
+        if COST_GUARD_ENABLED:
+            sql_query_final = await _apply_cost_guard(run, sql_query_final, query_for_agents, prompt_schema_string, db_schema_string)
+            if COST_GUARD_ACTION != "limit":
+                # A regenerated query passed the guard, so cache hits skip the regeneration. The LIMIT
+                # wrapper is left out of the cache; the guard re-applies it to each execution.
+                sql_query_cacheable = sql_query_final
+
+        _emit("sql", {"sql_query": sql_query_final})
 
         # 5. Database Execution
         db_exec_start_time = time.time()
         result_df = None
         db_exec_status = "❓"
         db_exec_details = ""
+        result_cache_hit = False
         try:
-            result_df = execute_sql_query_db(sql_query_final) # Assuming external database function
+            # Identical SQL over unchanged tables is answered from the result cache
+            result_df = result_cache.get(sql_query_final)
+            if result_df is not None:
+                result_cache_hit = True
+            else:
+                result_df = await run_stage("Database Execution", DB_STAGE_TIMEOUT_SECONDS, execute_sql_query_db, sql_query_final)
+                if result_df is not None:
+                    result_cache.put(sql_query_final, result_df)
             if result_df is None: # Indicates an execution failure or explicit None return
                 db_exec_status = "❌ Query execution failed or returned no data structure"
                 db_exec_details = "Execution resulted in None. Check DB logs or SQL syntax."
-                app_state["last_result_df"] = None
+                run["last_result_df"] = None
                 result_data_final = [] # Ensure result_data_final is an empty list on no data
                 raise ValueError(db_exec_details) # Critical failure
             elif result_df.empty:
                 db_exec_status = "✅ Query executed successfully (No Results)"
                 db_exec_details = f"Query returned 0 rows and {len(result_df.columns)} columns."
-                app_state["last_result_df"] = result_df
+                run["last_result_df"] = result_df
                 result_data_final = []
             else:
                 db_exec_status = "✅ Query executed successfully"
                 db_exec_details = f"Query returned {len(result_df)} rows and {len(result_df.columns)} columns."
-                app_state["last_result_df"] = result_df
-                result_data_final = result_df.to_dict(orient="records")
+                run["last_result_df"] = result_df
+                # Only the first page goes into the response; /results/{run_id} serves the rest
+                result_data_final = result_df.head(RESULT_PAGE_SIZE).to_dict(orient="records")
+            total_rows_final = len(result_df)
+            truncated_final = bool(result_df.attrs.get("truncated", False))
+            run["result_truncated"] = truncated_final
+            if truncated_final:
+                db_exec_status = "⚠️ Query executed, result truncated at row cap"
+                db_exec_details += f" Result truncated at RESULT_ROW_CAP={total_rows_final} rows."
+            if result_cache_hit:
+                db_exec_status = db_exec_status.replace("✅", "⚡", 1) + " (result cache)"
         except Exception as db_err: # Catch errors from execute_sql_query_db
             db_exec_status = "❌ Query execution error"
             db_exec_details = f"Error during SQL execution: {db_err}"
-            app_state["last_result_df"] = None
+            run["last_result_df"] = None
             result_data_final = [] # Ensure result_data_final is an empty list on error
             raise ValueError(db_exec_details) # Re-raise as critical failure for this process
         finally:
             db_exec_time = time.time() - db_exec_start_time
-            step5 = _add_processing_step(app_state, "Database Execution", db_exec_status, db_exec_details, db_exec_time)
-            app_state["last_db_execution_run"] = DatabaseExecutionResponse(
+            step5 = _add_processing_step(run, "Database Execution", db_exec_status, db_exec_details, db_exec_time, cache_hit=result_cache_hit or None)
+            run["last_db_execution_run"] = DatabaseExecutionResponse(
                 status=step5.status, details=step5.details, result_data=result_data_final, time_taken=step5.time_taken
             )
 
+        _emit("rows", {
+            "columns": list(result_df.columns),
+            "rows": result_data_final[:STREAM_PREVIEW_ROWS],
+            "total_rows": total_rows_final,
+            "truncated": truncated_final,
+        })
+
+        # The SQL ran, so it is worth reusing for the same question on the same schema
+        if cached_answer is None:
+            query_cache.put(query_for_agents, schema_fingerprint, sql_query_cacheable, explanation, needs_decomposition, run["last_decomposition"])
+
         # 6. Visualization Agent
         vis_start_time = time.time()
-        if app_state["last_result_df"] is not None and not app_state["last_result_df"].empty:
-            suggested_vis, vis_time, summary_insights_eng, detailed_data_insights_eng = VisualizationAgent.suggest_visualization(query_for_agents, app_state["last_result_df"]) # Assuming external agent
+        if run["last_result_df"] is not None and not run["last_result_df"].empty:
+            suggested_vis, vis_time, summary_insights_eng, detailed_data_insights_eng = await run_stage("Visualization Agent", LLM_STAGE_TIMEOUT_SECONDS, VisualizationAgent.suggest_visualization, query_for_agents, run["last_result_df"])
 
             # Store English versions
-            app_state["current_summary_insights_eng"] = summary_insights_eng
-            app_state["current_data_insights_eng"] = detailed_data_insights_eng
+            run["current_summary_insights_eng"] = summary_insights_eng
+            run["current_data_insights_eng"] = detailed_data_insights_eng
 
-            # Translate insights back to Arabic if the original query was Arabic
-            summary_insights_ar = await translate_text_to_ar(summary_insights_eng) # Assuming external translation function
-            data_insights_ar = await translate_text_to_ar(detailed_data_insights_eng) # Assuming external translation function
-            app_state["current_summary_insights_ar"] = summary_insights_ar
-            app_state["current_data_insights_ar"] = data_insights_ar
+            # Translate insights to Arabic (both concurrently) only when Arabic output is requested.
+            # Otherwise /summary-insights/arabic and /data-insights/arabic translate on demand.
+            if lang == 'arabic':
+                await with_deadline(translate_all_insights(run), LLM_STAGE_TIMEOUT_SECONDS, "Insight Translation")
 
-            # Set final insights based on original query language
-            summary_insights_final = app_state["current_summary_insights_ar"] if lang == 'arabic' else app_state["current_summary_insights_eng"]
-            data_insights_final = app_state["current_data_insights_ar"] if lang == 'arabic' else app_state["current_data_insights_eng"]
+            # Set final insights based on the requested language
+            summary_insights_final = run["current_summary_insights_ar"] if lang == 'arabic' else run["current_summary_insights_eng"]
+            data_insights_final = run["current_data_insights_ar"] if lang == 'arabic' else run["current_data_insights_eng"]
 
-            app_state["last_suggested_visualization"] = suggested_vis
+            run["last_suggested_visualization"] = suggested_vis
 
             suggested_visualization_final = suggested_vis
 
             vis_status = "✅ Visualization suggested with insights"
             vis_details = f"Suggested: `{suggested_vis}`. Summary: {summary_insights_final[:100]}..." if summary_insights_final else f"Suggested: `{suggested_vis}`."
-            step6 = _add_processing_step(app_state, "Visualization Agent", vis_status, vis_details, vis_time)
-            app_state["last_visualization_agent_run"] = VisualizationAgentResponse(
+            step6 = _add_processing_step(run, "Visualization Agent", vis_status, vis_details, vis_time)
+            run["last_visualization_agent_run"] = VisualizationAgentResponse(
                 status=step6.status, details=suggested_vis, insights=summary_insights_final, data_insights=data_insights_final, time_taken=step6.time_taken
             )
         else:
-            _add_processing_step(app_state, "Visualization Agent", "ℹ️ Skipped", "No data or empty data from DB execution.", 0.0)
-            app_state["last_visualization_agent_run"] = VisualizationAgentResponse(
+            _add_processing_step(run, "Visualization Agent", "ℹ️ Skipped", "No data or empty data from DB execution.", 0.0)
+            run["last_visualization_agent_run"] = VisualizationAgentResponse(
                 status="ℹ️ Skipped", details="No data for visualization.", insights=None, data_insights=None, time_taken=0.0
             )
             suggested_visualization_final = "Table" # Default
             summary_insights_final = "No data to analyze for summary insights."
             data_insights_final = "No data to analyze for detailed insights."
 
+        _emit("insights", {
+            "suggested_visualization": suggested_visualization_final,
+            "summary_insights": summary_insights_final,
+            "data_insights": data_insights_final,
+        })
+
 
     except ValueError as ve: # Catch specific ValueErrors raised in the flow
         error_final = str(ve)
         # The step causing the error should already be in processing_steps
         # Add a final overall error step if not already covered by a specific agent's failure step
-        if not any(step.status.startswith("❌") for step in app_state["processing_steps"]):
-             _add_processing_step(app_state, "Overall Process", "❌ Failed to process query", error_final, time.time() - overall_start_time)
+        if not any(step.status.startswith("❌") for step in run["processing_steps"]):
+             _add_processing_step(run, "Overall Process", "❌ Failed to process query", error_final, time.time() - overall_start_time)
     except Exception as e:
         error_final = f"An unexpected error occurred: {e}"
-        _add_processing_step(app_state, "Overall Process", "❌ Critical failure in query processing", error_final, time.time() - overall_start_time)
+        _add_processing_step(run, "Overall Process", "❌ Critical failure in query processing", error_final, time.time() - overall_start_time)
+    except asyncio.CancelledError:
+        # Client disconnected or the overall deadline passed: start no further LLM, SQL or translation work
+        _add_processing_step(run, "Overall Process", "⛔ Cancelled", "Query processing was cancelled before it completed.", time.time() - overall_start_time)
+        run_store.save(run)
+        raise
+    finally:
+        if speculative_sql_task is not None and not speculative_sql_used:
+            # Failed or cancelled before the speculative SQL was used
+            await _discard_speculative_sql(speculative_sql_task, "failed")
 
 
     overall_time_seconds = time.time() - overall_start_time
+    run_store.save(run) # Re-measure the finished run against the run store's memory budget
 
     return QueryProcessResponse(
+        run_id=run["run_id"],
         original_query=original_query, # User's original query (English or Arabic)
         sql_query=sql_query_final,
         result_data=result_data_final,
+        total_rows=total_rows_final,
+        truncated=truncated_final,
         suggested_visualization=suggested_visualization_final,
         summary_insights=summary_insights_final, # Return summary insights (translated if needed)
         data_insights=data_insights_final,    # Return detailed data insights (translated if needed)
-        processing_steps=app_state["processing_steps"],
+        processing_steps=run["processing_steps"],
         total_time_seconds=overall_time_seconds,
         error=error_final
     )
 
-# --- GET Endpoints to retrieve last known state of agents ---
+
+def _sse_event(event: str, data: Any) -> str:
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), default=str)}\n\n"
+
+
+@router.post("/query-process/{lang}", summary="Process Natural Language Query", response_model=QueryProcessResponse)
+async def process_query(query_input: QueryInput, request: Request, lang:str="english"):
+    """
+    Processes a natural language query through a series of agents (Schema Loader, Selector, Decomposer, Refiner,
+    Database Execution, Visualization) to generate SQL, execute it, and provide insights.
+    Supports language detection and translation for Arabic queries.
+    The pipeline is cancelled if the client disconnects or PIPELINE_TIMEOUT_SECONDS passes (504).
+    """
+    # Every call gets its own run state, so concurrent users never overwrite each other's results
+    run = run_store.create(query_input.query)
+    try:
+        return await run_until_disconnected(
+            request, with_deadline(_run_query_pipeline(run, lang), PIPELINE_TIMEOUT_SECONDS, "Query processing")
+        )
+    except ClientDisconnectedError:
+        return Response(status_code=499) # Client closed the request; nobody reads this response
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+
+
+@router.post("/query-process-stream/{lang}", summary="Process Natural Language Query (Server-Sent Events)")
+async def process_query_stream(query_input: QueryInput, request: Request, lang:str="english"):
+    """
+    Streaming variant of /query-process. Emits Server-Sent Events as the pipeline progresses:
+
+    - `run`: the run id, sent first
+    - `step`: each processing step (AgentStep) as soon as it completes
+    - `sql`: the generated SQL, before it is executed
+    - `rows`: the column names, the first STREAM_PREVIEW_ROWS result rows and the total row count
+    - `insights`: the suggested visualization and insights
+    - `final`: the complete QueryProcessResponse, identical to /query-process
+
+    The pipeline is cancelled as soon as the client disconnects.
+    """
+    run = run_store.create(query_input.query)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Any):
+        queue.put_nowait((event, data))
+
+    async def event_stream():
+        run["step_listener"] = lambda step: emit("step", step)
+        pipeline_task = asyncio.create_task(with_deadline(_run_query_pipeline(run, lang, emit=emit), PIPELINE_TIMEOUT_SECONDS, "Query processing"))
+        pipeline_task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            yield _sse_event("run", {"run_id": run["run_id"]})
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), DISCONNECT_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return # The finally block cancels the pipeline
+                    continue
+                if item is None: # Pipeline finished
+                    break
+                yield _sse_event(*item)
+            yield _sse_event("final", pipeline_task.result())
+        except Exception as e:
+            yield _sse_event("error", {"error": f"An unexpected error occurred: {e}"})
+        finally:
+            run.pop("step_listener", None)
+            if not pipeline_task.done():
+                pipeline_task.cancel() # Client went away; stop the pipeline
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- GET Endpoints to retrieve the agent outputs of a run ---
 
 @router.get("/selector-agent", summary="Get Last Selector Agent Result", response_model=SelectorAgentResponse)
-async def get_selector_agent_result():
+async def get_selector_agent_result(run_id: Optional[str] = None):
     """
-    Retrieves the results from the last Selector Agent execution via /query-process.
+    Retrieves the results from the Selector Agent execution of a /query-process run.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_selector_agent_run"] is None:
+    run = resolve_run(run_id)
+    if run is None or run["last_selector_agent_run"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Selector Agent has not been run yet via /query-process.")
-    return app_state["last_selector_agent_run"]
+    return run["last_selector_agent_run"]
 
 @router.get("/decomposer-agent", summary="Get Last Decomposer Agent Result", response_model=DecomposerAgentResponse)
-async def get_decomposer_agent_result():
+async def get_decomposer_agent_result(run_id: Optional[str] = None):
     """
-    Retrieves the results from the last Decomposer Agent execution via /query-process.
+    Retrieves the results from the Decomposer Agent execution of a /query-process run.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_decomposer_agent_run"] is None:
+    run = resolve_run(run_id)
+    if run is None or run["last_decomposer_agent_run"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Decomposer Agent has not been run or was skipped in the last /query-process.")
-    return app_state["last_decomposer_agent_run"]
+    return run["last_decomposer_agent_run"]
 
 @router.get("/refiner-agent", summary="Get Last Refiner Agent Result", response_model=RefinerAgentResponse)
-async def get_refiner_agent_result():
+async def get_refiner_agent_result(run_id: Optional[str] = None):
     """
-    Retrieves the SQL query generated by the last Refiner Agent execution via /query-process.
+    Retrieves the SQL query generated by the Refiner Agent execution of a /query-process run.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_refiner_agent_run"] is None:
+    run = resolve_run(run_id)
+    if run is None or run["last_refiner_agent_run"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Refiner Agent has not been run yet via /query-process.")
-    return app_state["last_refiner_agent_run"]
+    return run["last_refiner_agent_run"]
 
 @router.get("/database-execution", summary="Get Last Database Execution Result", response_model=DatabaseExecutionResponse)
-async def get_database_execution_result():
+async def get_database_execution_result(run_id: Optional[str] = None):
     """
-    Retrieves the results from the last database query execution via /query-process.
+    Retrieves the results from the database query execution of a /query-process run.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_db_execution_run"] is None:
+    run = resolve_run(run_id)
+    if run is None or run["last_db_execution_run"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Database execution has not occurred yet via /query-process.")
-    return app_state["last_db_execution_run"]
+    return run["last_db_execution_run"]
 
 @router.get("/visualization-agent", summary="Get Last Visualization Suggestion", response_model=VisualizationAgentResponse)
-async def get_visualization_agent_result():
+async def get_visualization_agent_result(run_id: Optional[str] = None):
     """
-    Retrieves the last visualization suggestion, summary insights, and detailed data insights from /query-process.
+    Retrieves the visualization suggestion, summary insights, and detailed data insights of a /query-process run.
+    Pass `run_id` (returned by /query-process) to select a run; defaults to the most recent run.
     """
-    if app_state["last_visualization_agent_run"] is None:
+    run = resolve_run(run_id)
+    if run is None or run["last_visualization_agent_run"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Visualization Agent has not been run or was skipped in the last /query-process.")
-    return app_state["last_visualization_agent_run"]
+    return run["last_visualization_agent_run"]
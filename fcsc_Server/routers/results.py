@@ -0,0 +1,121 @@
+import os
+import json
+from fastapi import APIRouter, HTTPException, status, Query
+from starlette.responses import StreamingResponse
+import pyarrow as pa
+
+from models.common import ResultPage
+from database import iter_sql_query_chunks
+from utils.arrow_results import get_result_table, table_to_ipc_stream, table_to_parquet, iter_buffer
+from utils.executor import run_blocking
+from utils.run_store import run_store, resolve_run
+from dotenv import load_dotenv
+load_dotenv()
+
+# Rows returned by /query-process and by default per /results/{run_id} page
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "500"))
+# Largest page a client may request from /results/{run_id}
+RESULT_MAX_PAGE_SIZE = int(os.getenv("RESULT_MAX_PAGE_SIZE", "5000"))
+
+
+router = APIRouter(
+    prefix="/results",
+    tags=['Results']
+)
+
+@router.get("/{run_id}", summary="Get a Page of a Run's Result", response_model=ResultPage)
+async def get_result_page(run_id: str, offset: int = Query(0, ge=0), limit: int = Query(RESULT_PAGE_SIZE, ge=1, le=RESULT_MAX_PAGE_SIZE)):
+    """
+    Returns rows [offset, offset + limit) of the result stored for a /query-process run,
+    together with the total row count. /query-process itself only returns the first page.
+    """
+    run = resolve_run(run_id)
+    result_df = run["last_result_df"]
+    if result_df is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No result available for this run. Run /query-process successfully first."
+        )
+
+    page_df = result_df.iloc[offset:offset + limit]
+    # NaN is not valid JSON; send missing values as null
+    page_df = page_df.astype(object).where(page_df.notna(), None)
+    return ResultPage(
+        run_id=run["run_id"],
+        offset=offset,
+        limit=limit,
+        total_rows=len(result_df),
+        truncated=run["result_truncated"],
+        columns=[str(col) for col in result_df.columns],
+        rows=page_df.to_dict(orient="records"),
+    )
+
+@router.get("/{run_id}/stream", summary="Stream a Run's Full Result as NDJSON")
+async def stream_result(run_id: str, max_rows: int = Query(0, ge=0)):
+    """
+    Re-executes the SQL of a /query-process run and streams every row as newline-delimited JSON,
+    without RESULT_ROW_CAP. Rows are fetched from the database in windows of RESULT_FETCH_CHUNK_ROWS,
+    so server memory stays flat however large the result is. Pass `max_rows` to stop early.
+    If the database fails mid-stream, the last line is `{"error": "..."}`.
+    """
+    run = resolve_run(run_id)
+    if run["last_result_df"] is None or not run["last_sql_generated"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No successfully executed SQL for this run. Run /query-process successfully first."
+        )
+    sql_query = run["last_sql_generated"]
+
+    def ndjson_lines():
+        # A plain generator: Starlette iterates it in a worker thread, so the blocking fetches stay off the event loop
+        try:
+            for rows in iter_sql_query_chunks(sql_query, max_rows=max_rows):
+                yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        except Exception as e:
+            yield json.dumps({"error": f"Error during SQL execution: {e}"}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+async def _get_run_table(run_id: str):
+    run = resolve_run(run_id)
+    if run["last_result_df"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No result available for this run. Run /query-process successfully first."
+        )
+    try:
+        table = await run_blocking(get_result_table, run)
+    except pa.ArrowException as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not convert the result of this run to Arrow: {e}"
+        )
+    run_store.save(run) # Count the memoized Arrow table against the run store's memory budget
+    return run, table
+
+@router.get("/{run_id}/arrow", summary="Download a Run's Result as an Arrow IPC Stream")
+async def download_result_arrow(run_id: str):
+    """
+    Returns the stored result of a /query-process run in the Arrow IPC streaming format, with column
+    types preserved. Clients can load it directly (e.g. `pyarrow.ipc.open_stream`) without parsing JSON.
+    """
+    run, table = await _get_run_table(run_id)
+    buffer = await run_blocking(table_to_ipc_stream, table)
+    return StreamingResponse(
+        iter_buffer(buffer),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={"Content-Disposition": f"attachment; filename=query_result_{run['run_id']}.arrows"}
+    )
+
+@router.get("/{run_id}/parquet", summary="Download a Run's Result as Parquet")
+async def download_result_parquet(run_id: str):
+    """
+    Returns the stored result of a /query-process run as a Parquet file.
+    """
+    run, table = await _get_run_table(run_id)
+    buffer = await run_blocking(table_to_parquet, table)
+    return StreamingResponse(
+        iter_buffer(buffer),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f"attachment; filename=query_result_{run['run_id']}.parquet"}
+    )
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, status
 from models.agents import SchemaLoaderResponse
 from main import app_state # Import the global app_state
+from utils.schema_cache import schema_cache, is_schema_error
+from utils.result_cache import result_cache
+from utils.executor import run_blocking
 
 router = APIRouter(
     prefix="/schema",
@@ -11,7 +14,7 @@ router = APIRouter(
 async def get_db_schema_state():
     """
     Retrieves the state of the last schema loading attempt (e.g., from startup or /query-process).
-    Does not actively reload the schema here; use /query-process to refresh.
+    Does not actively reload the schema here; use POST /schema/refresh to refresh.
     """
     if app_state["last_schema_loader_run"]:
         return app_state["last_schema_loader_run"]
@@ -24,3 +27,25 @@ async def get_db_schema_state():
         )
     else:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schema has not been loaded yet. Trigger a process that loads it, like /query-process or restart the app.")
+
+
+@router.post("/refresh", summary="Reload Database Schema", response_model=SchemaLoaderResponse)
+async def refresh_db_schema():
+    """
+    Invalidates the schema cache and reloads the schema from the database. Use this after
+    changing tables outside of /upload-csv; otherwise the cache refreshes itself on its TTL.
+    Cached query results are dropped as well, since their tables may have changed.
+    """
+    schema_cache.invalidate()
+    result_cache.invalidate_all()
+    schema_string, fingerprint, _, time_taken = await run_blocking(schema_cache.get, force_refresh=True)
+    if is_schema_error(schema_string):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to reload schema: {schema_string}")
+    app_state["db_schema_string"] = schema_string
+    app_state["last_schema_loader_run"] = SchemaLoaderResponse(
+        status="✅ Schema reloaded on demand",
+        details=f"Schema fingerprint {fingerprint}.",
+        schema_content=schema_string,
+        time_taken=time_taken
+    )
+    return app_state["last_schema_loader_run"]
@@ -1,77 +1,95 @@
+import os
 import time
-import pandas as pd
 from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from io import StringIO
 from typing import Dict, Any
 
 from main import app_state # Import the global app_state
-from agents.schema_loader_agent import SchemaLoaderAgent # Assuming this remains external
-from fast_api_file_upload import insert_data, create_table_if_not_exists, clean_column_name # Assuming these remain external
+from utils.schema_cache import schema_cache
+from utils.result_cache import result_cache
+from utils.executor import run_blocking
+from utils.ingestion_jobs import (
+    ingestion_jobs, CREATING_TABLE, INSERTING, REFRESHING_SCHEMA, COMPLETED, FAILED, SKIPPED
+)
+from fast_api_file_upload import (
+    insert_csv_file, create_table_if_not_exists, clean_column_name, spool_to_disk, infer_csv_dtypes, drop_table
+) # Assuming these remain external
 
 router = APIRouter(
     prefix="/upload-csv",
     tags=['Upload-CSV']
 )
 
-@router.post("", summary="Upload CSV to Database", response_model=dict)
-async def upload_csv_endpoint(file: UploadFile = File(...)):
-    """
-    Endpoint to upload a CSV file, create a table in the database based on its content,
-    and insert the data into the new table. The database schema is then reloaded.
-    """
-    overall_start_time = time.time()
-    processing_steps_upload = [] # Local list for this endpoint's steps
-
-    def _add_upload_step(agent_name: str, status_msg: str, details_msg: str | dict, time_taken_step: float):
-        """Helper to add steps specifically for the upload process."""
-        processing_steps_upload.append({
-            "agent": agent_name, "status": status_msg, "details": details_msg, "time_taken": time_taken_step
-        })
-
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only CSV files are allowed.")
 
-    table_name_raw = file.filename.replace(".csv", "")
-    table_name = clean_column_name(table_name_raw)
+def _ingest_csv(job_id: str, csv_path: str, filename: str, table_name: str):
+    """
+    Runs one upload on an ingestion worker: infers column types, creates the table, streams the
+    rows in and reloads the schema, recording progress on the job as it goes.
 
+    If the file cannot be ingested to the end, the table created for it is dropped again, so the
+    corrected file can be uploaded under the same name.
+    """
+    start_time = time.time()
+    table_was_created = False
+    insert_stats = None
     try:
-        content = await file.read()
-        df = pd.read_csv(StringIO(content.decode("utf-8")))
+        sample_df, csv_dtypes = infer_csv_dtypes(csv_path)
 
         # Check if table exists and handle accordingly
-        table_was_created = False
+        ingestion_jobs.update(job_id, phase=CREATING_TABLE, message=f"Creating table '{table_name}'.")
         try:
-            table_was_created = create_table_if_not_exists(df, table_name) # Assuming external function
-            if table_was_created:
-                _add_upload_step("Table Creation", "✅ Table ensured", f"Table '{table_name}' created.", time.time() - overall_start_time)
-            else:
-                _add_upload_step("Table Creation", "ℹ️ Table already exists", f"Table '{table_name}' already exists. Skipping creation and data insertion.", time.time() - overall_start_time)
-                # If table already exists, return early with a specific message
-                return {
-                    "message": f"File '{file.filename}' corresponds to an existing table '{table_name}'. Data not inserted to avoid duplication.",
-                    "table_name": table_name,
-                    "rows_inserted": 0,
-                    "total_time_seconds": time.time() - overall_start_time,
-                    "processing_steps": processing_steps_upload
-                }
+            table_was_created = create_table_if_not_exists(sample_df, table_name) # Assuming external function
         except Exception as cte:
             error_detail = f"Failed to create or verify table '{table_name}': {cte}"
-            _add_upload_step("Table Creation", "❌ Table creation/verification failed", error_detail, time.time() - overall_start_time)
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_detail)
+            ingestion_jobs.add_step(job_id, "Table Creation", "❌ Table creation/verification failed", error_detail, time.time() - start_time)
+            ingestion_jobs.finish(job_id, FAILED, error_detail, error=error_detail)
+            return
+        if not table_was_created:
+            ingestion_jobs.add_step(job_id, "Table Creation", "ℹ️ Table already exists", f"Table '{table_name}' already exists. Skipping creation and data insertion.", time.time() - start_time)
+            ingestion_jobs.finish(job_id, SKIPPED, f"File '{filename}' corresponds to an existing table '{table_name}'. Data not inserted to avoid duplication.")
+            return
+        ingestion_jobs.add_step(job_id, "Table Creation", "✅ Table ensured", f"Table '{table_name}' created.", time.time() - start_time)
 
         # Only insert data if the table was newly created
-        if table_was_created:
-            insert_data(df, table_name) # Assuming external function
-            _add_upload_step("Data Insertion", "✅ Data inserted", f"{len(df)} rows inserted into '{table_name}'.", time.time() - overall_start_time)
+        ingestion_jobs.update(job_id, phase=INSERTING, message=f"Inserting rows into '{table_name}'.")
+        insert_stats = insert_csv_file(
+            csv_path, table_name, csv_dtypes,
+            on_progress=lambda stats: ingestion_jobs.update(
+                job_id, rows_ingested=stats["rows_inserted"], rows_failed=stats["rows_failed"], chunks=stats["chunks"]
+            ),
+        ) # Chunked parse + batched (or COPY) ingest
+        result_cache.invalidate_table(table_name) # Cached results that read this table are stale
+        insert_details = (
+            f"{insert_stats['rows_inserted']} of {insert_stats['rows_inserted'] + insert_stats['rows_failed']} rows inserted into "
+            f"'{table_name}' via {insert_stats['method']} in {insert_stats['chunks']} chunk(s) / {insert_stats['batches']} batch(es), "
+            f"{insert_stats['rows_per_second']} rows/s."
+        )
+        if insert_stats["warnings"]:
+            insert_details += f" Warnings: {' | '.join(insert_stats['warnings'])}"
+        if insert_stats["errors"]:
+            insert_details += f" Errors: {' | '.join(insert_stats['errors'])}"
+        if insert_stats["aborted"]:
+            dropped = drop_table(table_name)
+            insert_details = insert_details.rstrip(".") + f". Table '{table_name}' {'dropped' if dropped else 'could not be dropped'}; fix the file and upload it again."
+            insert_status = "❌ Data insertion failed"
+        elif not insert_stats["errors"]:
+            insert_status = "✅ Data inserted"
+        elif insert_stats["rows_inserted"]:
+            insert_status = "⚠️ Data partially inserted"
         else:
-            # This part will technically not be reached due to the early return above,
-            # but it's good for logical completeness if the early return logic changes.
-            _add_upload_step("Data Insertion", "ℹ️ Data insertion skipped", "Data not inserted as table already existed.", time.time() - overall_start_time)
-
+            insert_status = "❌ Data insertion failed"
+        ingestion_jobs.add_step(job_id, "Data Insertion", insert_status, insert_details, time.time() - start_time)
+        ingestion_jobs.update(
+            job_id, rows_ingested=insert_stats["rows_inserted"], rows_failed=insert_stats["rows_failed"],
+            chunks=insert_stats["chunks"], ingestion=insert_stats, errors=list(insert_stats["errors"]),
+        )
+        if insert_stats["aborted"]:
+            ingestion_jobs.finish(job_id, FAILED, f"File '{filename}' could not be ingested; table '{table_name}' was not kept.")
+            return
 
         # Refresh schema in global app state to include the new table
-        schema_refresh_start = time.time()
-        schema_string, schema_time = SchemaLoaderAgent.load_schema_from_db() # Assuming external function
+        ingestion_jobs.update(job_id, phase=REFRESHING_SCHEMA, message="Reloading the database schema.")
+        schema_cache.invalidate() # The new table changes the schema, so the cached copy is stale
+        schema_string, _, _, schema_time = schema_cache.get(force_refresh=True)
         app_state["db_schema_string"]=  schema_string # Update global state
         # Update last run details for the schema endpoint
         from models.agents import SchemaLoaderResponse
@@ -81,22 +99,58 @@ async def upload_csv_endpoint(file: UploadFile = File(...)):
             schema_content=schema_string,
             time_taken=schema_time
         )
-        _add_upload_step("Schema Refresh", "✅ Schema reloaded", "Schema updated to include new table.", schema_time)
-
-        total_time = time.time() - overall_start_time
-        return {
-            "message": f"File '{file.filename}' processed. Data inserted into table '{table_name}'.",
-            "table_name": table_name,
-            "rows_inserted": len(df) if table_was_created else 0, # Report rows inserted only if new
-            "total_time_seconds": total_time,
-            "processing_steps": processing_steps_upload
-        }
-
-    except HTTPException as he:
-        raise he
+        ingestion_jobs.add_step(job_id, "Schema Refresh", "✅ Schema reloaded", "Schema updated to include new table.", schema_time)
+
+        if insert_stats["rows_inserted"] or not insert_stats["errors"]:
+            ingestion_jobs.finish(job_id, COMPLETED, f"File '{filename}' processed. Data inserted into table '{table_name}'.")
+        else:
+            ingestion_jobs.finish(job_id, FAILED, f"No rows from '{filename}' could be inserted into table '{table_name}'.")
+    except Exception as e:
+        error_msg = f"Failed to process file upload for '{filename}': {e}"
+        if table_was_created and insert_stats is None:
+            drop_table(table_name) # Data was not fully ingested; don't leave a partial table that blocks re-uploads
+        ingestion_jobs.add_step(job_id, "File Upload", "❌ File upload failed", error_msg, time.time() - start_time)
+        ingestion_jobs.finish(job_id, FAILED, error_msg, error=error_msg)
+    finally:
+        os.remove(csv_path) # The spooled copy is only needed while ingesting
+
+
+@router.post("", summary="Upload CSV to Database", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def upload_csv_endpoint(file: UploadFile = File(...)):
+    """
+    Endpoint to upload a CSV file, create a table in the database based on its content,
+    and insert the data into the new table. The database schema is then reloaded.
+
+    The upload is spooled to a temporary file and queued as an ingestion job; the response returns
+    the job id right away. Poll `/upload-jobs/{job_id}` for the phase, rows ingested, throughput and
+    errors. At most INGEST_JOB_WORKERS files are ingested at the same time.
+
+    The file is parsed in chunks of UPLOAD_CHUNK_ROWS rows, with column types inferred from the first
+    UPLOAD_SAMPLE_ROWS rows, so memory use does not grow with the file size.
+    """
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only CSV files are allowed.")
+
+    table_name_raw = file.filename.replace(".csv", "")
+    table_name = clean_column_name(table_name_raw)
+
+    try:
+        csv_path = await run_blocking(spool_to_disk, file.file)
     except Exception as e:
-        time_taken = time.time() - overall_start_time
-        error_msg = f"Failed to process file upload for '{file.filename}': {e}"
-        _add_upload_step("File Upload", "❌ File upload failed", error_msg, time_taken)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail={"error": error_msg, "processing_steps": processing_steps_upload})
+                            detail=f"Failed to receive file '{file.filename}': {e}")
+
+    try:
+        job_id = ingestion_jobs.submit(file.filename, table_name, _ingest_csv, csv_path, file.filename, table_name, spool_path=csv_path)
+    except ValueError as e:
+        os.remove(csv_path)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    response: Dict[str, Any] = {
+        "message": f"File '{file.filename}' queued for ingestion into table '{table_name}'.",
+        "job_id": job_id,
+        "status_url": f"/upload-jobs/{job_id}",
+        "table_name": table_name,
+        "phase": ingestion_jobs.get(job_id)["phase"],
+    }
+    return response
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, status
+
+from models.common import IngestionJob
+from utils.ingestion_jobs import ingestion_jobs
+
+router = APIRouter(
+    prefix="/upload-jobs",
+    tags=['Upload-CSV']
+)
+
+@router.get("", summary="List Ingestion Jobs", response_model=list[IngestionJob])
+async def list_ingestion_jobs():
+    """
+    Returns every queued, running and recently finished ingestion job, newest first.
+    """
+    return ingestion_jobs.list_jobs()
+
+@router.get("/{job_id}", summary="Get Ingestion Job Progress", response_model=IngestionJob)
+async def get_ingestion_job(job_id: str):
+    """
+    Returns the phase, rows ingested so far, throughput and errors of an ingestion job started by /upload-csv.
+    Finished jobs are kept for INGEST_JOB_RETENTION_SECONDS.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ingestion job '{job_id}' not found. It may have expired."
+        )
+    return job
@@ -0,0 +1,30 @@
+import pandas as pd
+import pyarrow as pa
+
+from utils.arrow_results import get_result_table, table_to_ipc_stream, table_to_parquet
+
+
+def test_mixed_type_column_is_served_as_strings():
+    result_df = pd.DataFrame({
+        "value": [1, "n/a", None, 2.5, [1, 2]],
+        "amount": [10, 20, 30, 40, 50],
+    })
+    run = {"last_result_df": result_df}
+
+    table = get_result_table(run)
+
+    assert table.schema.field("amount").type == pa.int64()
+    assert pa.types.is_string(table.schema.field("value").type) or pa.types.is_large_string(table.schema.field("value").type)
+    assert table.column("value").to_pylist() == ["1", "n/a", None, "2.5", "[1, 2]"]
+    assert run["result_arrow_table"] is table
+    assert table_to_ipc_stream(table).size > 0
+    assert table_to_parquet(table).size > 0
+
+
+def test_typed_columns_are_kept():
+    result_df = pd.DataFrame({"region": ["north", None], "total": [1.5, 2.0]})
+
+    table = get_result_table({"last_result_df": result_df})
+
+    assert table.schema.field("total").type == pa.float64()
+    assert table.column("region").to_pylist() == ["north", None]
@@ -0,0 +1,35 @@
+import pytest
+
+from backends.sqlite_backend import SqliteBackend
+
+
+@pytest.fixture
+def backend():
+    backend = SqliteBackend(":memory:")
+    backend.execute("CREATE TABLE sales (id INTEGER, region TEXT, amount REAL, customer_id INTEGER)")
+    backend.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, region TEXT)")
+    return backend
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT region FROM sales UNION SELECT region FROM customers",
+    "SELECT * FROM sales WHERE region IN (SELECT region FROM customers)",
+    "SELECT * FROM sales WHERE amount > (SELECT AVG(amount) FROM sales)",
+    "SELECT * FROM sales s JOIN customers c ON s.customer_id = c.id",
+    "SELECT * FROM sales s JOIN customers c ON s.region = c.region",
+])
+def test_queries_without_cartesian_join(backend, sql):
+    assert backend.explain(sql)["cartesian_join"] is False
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM sales s, customers c",
+    "SELECT * FROM sales s CROSS JOIN customers c",
+])
+def test_cartesian_join(backend, sql):
+    assert backend.explain(sql)["cartesian_join"] is True
+
+
+def test_seq_scans_report_table_names(backend):
+    plan = backend.explain("SELECT * FROM sales s, customers c")
+    assert sorted(plan["seq_scans"]) == ["customers", "sales"]
@@ -1,17 +1,112 @@
+import os
+import asyncio
+import unicodedata
 from googletrans import Translator
+from dotenv import load_dotenv
+
+from utils.translation_cache import translation_cache
+
+load_dotenv()
+
+# Minimum share of letters in the dominant script for the local detector to decide on its own
+LANG_DETECT_MIN_CONFIDENCE = float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", "0.8"))
+# Shared translator session: maximum concurrent remote calls and per-call timeout
+TRANSLATOR_MAX_CONCURRENCY = int(os.getenv("TRANSLATOR_MAX_CONCURRENCY", "8"))
+TRANSLATOR_TIMEOUT_SECONDS = float(os.getenv("TRANSLATOR_TIMEOUT_SECONDS", "10"))
+
+# Unicode blocks used to write Arabic (base, supplement, extended-A, presentation forms A and B)
+_ARABIC_RANGES = ((0x0600, 0x06FF), (0x0750, 0x077F), (0x08A0, 0x08FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF))
+
+
+def _is_arabic_char(ch: str) -> bool:
+    code = ord(ch)
+    return any(start <= code <= end for start, end in _ARABIC_RANGES)
+
+
+def detect_script_language(text: str) -> tuple[str, float]:
+    """
+    Classifies text as Arabic or English from the Unicode script of its letters, without a network call.
+
+    Args:
+        text (str): The text to classify.
+
+    Returns:
+        tuple[str, float]: A tuple containing:
+                           - str: "ar" if Arabic-script letters dominate, otherwise "en".
+                           - float: Confidence, i.e. the share of letters in the dominant script
+                                    (1.0 for text without letters, which needs no translation).
+    """
+    arabic = latin = 0
+    for ch in text:
+        if _is_arabic_char(ch):
+            if unicodedata.category(ch).startswith("L"):
+                arabic += 1
+        elif ch.isalpha() and unicodedata.name(ch, "").startswith("LATIN"):
+            latin += 1
+
+    letters = arabic + latin
+    if letters == 0:
+        return "en", 1.0
+    if arabic >= latin:
+        return "ar", arabic / letters
+    return "en", latin / letters
+
+
+_translator: Translator | None = None
+_translator_semaphore: asyncio.Semaphore | None = None
+
+
+async def start_translator_session():
+    """
+    Opens the long-lived translator session (one pooled, keep-alive HTTP client) shared by all calls.
+    Called on app startup; calls made before that open the session lazily.
+    """
+    global _translator, _translator_semaphore
+    if _translator is None:
+        _translator = Translator(timeout=TRANSLATOR_TIMEOUT_SECONDS)
+        _translator_semaphore = asyncio.Semaphore(TRANSLATOR_MAX_CONCURRENCY)
+
+
+async def close_translator_session():
+    """
+    Closes the shared translator session and its HTTP connections. Called on app shutdown.
+    Also closes the translation cache, writing its pending last_used updates.
+    """
+    global _translator
+    translation_cache.close()
+    if _translator is not None:
+        translator, _translator = _translator, None
+        await translator.client.aclose()
+
+
+async def _call_translator(method: str, *args, **kwargs):
+    if _translator is None:
+        await start_translator_session()
+    async with _translator_semaphore:
+        return await asyncio.wait_for(getattr(_translator, method)(*args, **kwargs), TRANSLATOR_TIMEOUT_SECONDS)
+
 
 async def translate_text_to_eng(text:str):
-    async with Translator() as translator:
-        result = await translator.translate(text, dest='en')
-        return result.text
+    cached = await translation_cache.aget(text, 'en')
+    if cached is not None:
+        return cached
+    result = await _call_translator("translate", text, dest='en')
+    await translation_cache.aput(text, 'en', result.text)
+    return result.text
 
 
 async def translate_text_to_ar(text:str):
-    async with Translator() as translator:
-        result = await translator.translate(text, dest='ar')
-        return result.text
+    cached = await translation_cache.aget(text, 'ar')
+    if cached is not None:
+        return cached
+    result = await _call_translator("translate", text, dest='ar')
+    await translation_cache.aput(text, 'ar', result.text)
+    return result.text
 
 async def detect_languages(text:str):
-    async with Translator() as translator:
-        result = await translator.detect(text)
-        return result.lang
+    # Local script detection settles almost every query; only mixed-script text goes to the remote detector
+    lang, confidence = detect_script_language(text)
+    if confidence >= LANG_DETECT_MIN_CONFIDENCE:
+        return lang
+    result = await _call_translator("detect", text)
+    return result.lang
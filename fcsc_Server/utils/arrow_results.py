@@ -0,0 +1,74 @@
+from typing import Dict, Any, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Bytes per chunk when streaming an Arrow or Parquet buffer to the client
+_STREAM_CHUNK_BYTES = 1024 * 1024
+
+
+def get_result_table(run: Dict[str, Any]) -> pa.Table | None:
+    """
+    Returns the result of a run as an Arrow table, converting `last_result_df` on first use
+    and memoizing the table in the run.
+
+    Returns:
+        pa.Table | None: The typed, columnar result, or None if the run has no result.
+    """
+    result_df = run.get("last_result_df")
+    if result_df is None:
+        return None
+    table = run.get("result_arrow_table")
+    if table is None:
+        try:
+            table = pa.Table.from_pandas(result_df, preserve_index=False)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # Mixed-type object columns (e.g. ints and strings from a JSON RPC result) have no single Arrow type
+            table = pa.Table.from_pandas(_stringify_mixed_columns(result_df), preserve_index=False)
+        run["result_arrow_table"] = table
+    return table
+
+
+def _stringify_mixed_columns(result_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a copy of result_df in which every object column Arrow cannot type is converted to
+    strings. Missing values stay null.
+    """
+    result_df = result_df.copy()
+    for column in result_df.columns:
+        if result_df[column].dtype != object:
+            continue
+        try:
+            pa.array(result_df[column], from_pandas=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            result_df[column] = result_df[column].map(str, na_action="ignore")
+    return result_df
+
+
+def table_to_ipc_stream(table: pa.Table) -> pa.Buffer:
+    """
+    Serializes an Arrow table in the Arrow IPC streaming format.
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def table_to_parquet(table: pa.Table) -> pa.Buffer:
+    """
+    Serializes an Arrow table as a Parquet file.
+    """
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    return sink.getvalue()
+
+
+def iter_buffer(buffer: pa.Buffer) -> Iterator[memoryview]:
+    """
+    Yields an Arrow buffer in chunks as memoryview slices, without copying it into bytes.
+    """
+    view = memoryview(buffer)
+    for start in range(0, len(view), _STREAM_CHUNK_BYTES):
+        yield view[start:start + _STREAM_CHUNK_BYTES]
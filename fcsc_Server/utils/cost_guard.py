@@ -0,0 +1,94 @@
+import os
+import time
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+from database import get_db_connection
+
+load_dotenv()
+
+# Pre-execution EXPLAIN check of generated SQL (off by default: it costs one extra database round-trip)
+COST_GUARD_ENABLED = os.getenv("COST_GUARD_ENABLED", "false").lower() == "true"
+COST_GUARD_MAX_ROWS = float(os.getenv("COST_GUARD_MAX_ROWS", "1000000"))
+COST_GUARD_MAX_COST = float(os.getenv("COST_GUARD_MAX_COST", "10000000"))
+# What to do with a query over the thresholds: "reject", "limit" or "regenerate"
+COST_GUARD_ACTION = os.getenv("COST_GUARD_ACTION", "reject").lower()
+# Row limit applied by the "limit" action
+COST_GUARD_LIMIT_ROWS = int(os.getenv("COST_GUARD_LIMIT_ROWS", "1000"))
+
+
+def estimate_sql_cost(sql_query: str) -> tuple[Dict[str, Any], float]:
+    """
+    Runs EXPLAIN for a query (without executing it) and compares the planner's estimates
+    against COST_GUARD_MAX_ROWS and COST_GUARD_MAX_COST.
+
+    Args:
+        sql_query (str): The SQL to check.
+
+    Returns:
+        tuple[Dict[str, Any], float]: A tuple containing:
+                                      - Dict[str, Any]: The report: "available" (False if the backend could not
+                                        explain the query), "total_cost", "plan_rows", "seq_scans",
+                                        "cartesian_join", "violations" (reasons the query is over budget) and "error".
+                                      - float: The time taken in seconds.
+    """
+    start_time = time.time()
+    report = {"available": False, "total_cost": None, "plan_rows": None, "seq_scans": [],
+              "cartesian_join": False, "violations": [], "error": None}
+    try:
+        plan = get_db_connection().explain(sql_query)
+    except Exception as e:
+        report["error"] = f"EXPLAIN failed: {e}"
+        return report, time.time() - start_time
+    if plan is None:
+        report["error"] = "The database backend does not support EXPLAIN."
+        return report, time.time() - start_time
+
+    report.update(available=True, total_cost=plan["total_cost"], plan_rows=plan["plan_rows"],
+                  seq_scans=plan["seq_scans"], cartesian_join=plan["cartesian_join"])
+    if plan["plan_rows"] is not None and plan["plan_rows"] > COST_GUARD_MAX_ROWS:
+        report["violations"].append(f"estimated {plan['plan_rows']:,.0f} rows > COST_GUARD_MAX_ROWS {COST_GUARD_MAX_ROWS:,.0f}")
+    if plan["total_cost"] is not None and plan["total_cost"] > COST_GUARD_MAX_COST:
+        report["violations"].append(f"estimated cost {plan['total_cost']:,.0f} > COST_GUARD_MAX_COST {COST_GUARD_MAX_COST:,.0f}")
+    if plan["cartesian_join"]:
+        report["violations"].append("the plan contains a join without a join condition (cartesian product)")
+    return report, time.time() - start_time
+
+
+def summarize_cost_report(report: Dict[str, Any]) -> str:
+    """
+    One-line plan summary for processing_steps.
+    """
+    if not report["available"]:
+        return report["error"] or "No plan available."
+    parts = [
+        f"cost {report['total_cost']:,.0f}" if report["total_cost"] is not None else "cost n/a",
+        f"rows {report['plan_rows']:,.0f}" if report["plan_rows"] is not None else "rows n/a",
+    ]
+    if report["seq_scans"]:
+        parts.append(f"full scans: {', '.join(str(t) for t in report['seq_scans'])}")
+    summary = "Plan estimate: " + ", ".join(parts) + "."
+    if report["violations"]:
+        summary += " Over budget: " + "; ".join(report["violations"]) + "."
+    return summary
+
+
+def limit_sql_query(sql_query: str, limit: int = COST_GUARD_LIMIT_ROWS) -> str:
+    """
+    Wraps a query so it returns at most `limit` rows.
+    """
+    sql_query = sql_query.strip().rstrip(";").strip()
+    return f"SELECT * FROM (\n{sql_query}\n) AS _guarded LIMIT {limit}"
+
+
+def regeneration_feedback(query: str, report: Dict[str, Any]) -> str:
+    """
+    Extends the user's query with the reasons the previous SQL was too expensive, for the Refiner.
+    """
+    return (
+        f"{query}\n\n"
+        f"Note: a previously generated SQL query for this question was rejected as too expensive "
+        f"({'; '.join(report['violations'])}). Write a cheaper query: join only on matching keys, "
+        f"filter and aggregate as early as possible, and never produce a cartesian product."
+    )
@@ -0,0 +1,72 @@
+import os
+import asyncio
+from typing import Awaitable, Callable, Any
+
+from starlette.requests import Request
+from dotenv import load_dotenv
+
+from utils.executor import run_blocking
+
+load_dotenv()
+
+# Deadlines per pipeline stage and for a whole /query-process call (0 disables a deadline)
+LLM_STAGE_TIMEOUT_SECONDS = float(os.getenv("LLM_STAGE_TIMEOUT_SECONDS", "90"))
+DB_STAGE_TIMEOUT_SECONDS = float(os.getenv("DB_STAGE_TIMEOUT_SECONDS", "30"))
+PIPELINE_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_TIMEOUT_SECONDS", "300"))
+# How often /query-process checks whether the HTTP client is still connected
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+
+class StageTimeoutError(ValueError):
+    """
+    Raised when a pipeline stage misses its deadline. A ValueError, so the pipeline reports it
+    like any other stage failure.
+    """
+
+
+class ClientDisconnectedError(Exception):
+    """
+    Raised when the HTTP client went away and the pipeline was cancelled.
+    """
+
+
+async def with_deadline(awaitable: Awaitable, seconds: float, stage: str) -> Any:
+    """
+    Awaits `awaitable`, cancelling it and raising StageTimeoutError if it takes longer than `seconds`.
+    """
+    if seconds <= 0:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, seconds)
+    except asyncio.TimeoutError:
+        raise StageTimeoutError(f"{stage} timed out after {seconds:g}s.")
+
+
+async def run_stage(stage: str, seconds: float, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking stage on the shared executor (see run_blocking) under a deadline.
+
+    The awaiting request stops waiting at the deadline and frees up. A worker thread that is
+    already inside a blocking call cannot be interrupted; it finishes in the background, and its
+    result is discarded.
+    """
+    return await with_deadline(run_blocking(func, *args, **kwargs), seconds, stage)
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable, poll_seconds: float = DISCONNECT_POLL_SECONDS) -> Any:
+    """
+    Awaits `awaitable` while polling the HTTP connection. If the client disconnects first, the work
+    is cancelled (no further LLM calls, SQL or translations are started) and ClientDisconnectedError is raised.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnectedError("Client disconnected; query processing cancelled.")
+    finally:
+        if not task.done():
+            task.cancel()
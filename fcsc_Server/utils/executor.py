@@ -0,0 +1,50 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Size of the thread pool that blocking pipeline stages (LLM calls, database round-trips)
+# are offloaded to. Each in-flight stage holds one worker thread.
+AGENT_EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", "16"))
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the shared executor, creating it on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AGENT_EXECUTOR_WORKERS, thread_name_prefix="agent-worker")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a synchronous (blocking) callable on the shared executor and awaits its result,
+    so the event loop keeps serving other requests while the call is in flight.
+
+    Args:
+        func (Callable): The blocking function, e.g. SelectorAgent.is_query_answerable.
+        *args, **kwargs: Arguments forwarded to func.
+
+    Returns:
+        Any: Whatever func returns. Exceptions raised by func propagate to the caller.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """
+    Shuts the shared executor down. Called on application shutdown.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Uploads ingested at the same time; further uploads wait in the queue
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "2"))
+# How long finished jobs stay queryable through /upload-jobs
+INGEST_JOB_RETENTION_SECONDS = float(os.getenv("INGEST_JOB_RETENTION_SECONDS", "3600"))
+
+# Job phases, in order. A job ends in one of the FINISHED_PHASES.
+QUEUED, PARSING, CREATING_TABLE, INSERTING, REFRESHING_SCHEMA = "queued", "parsing", "creating_table", "inserting", "refreshing_schema"
+COMPLETED, FAILED, SKIPPED = "completed", "failed", "skipped"
+FINISHED_PHASES = {COMPLETED, FAILED, SKIPPED}
+
+
+def new_job_state(job_id: str, filename: str, table_name: str) -> Dict[str, Any]:
+    """
+    Builds the state dictionary for a single CSV ingestion job.
+    """
+    return {
+        "job_id": job_id,
+        "filename": filename,
+        "table_name": table_name,
+        "phase": QUEUED,
+        "message": "Waiting for an ingestion worker.",
+        "rows_ingested": 0,
+        "rows_failed": 0,
+        "chunks": 0,
+        "rows_per_second": 0.0,
+        "elapsed_seconds": 0.0, # Since the job started running (not counting time in the queue)
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "errors": [],
+        "ingestion": None, # Final insert statistics (see insert_csv_file)
+        "processing_steps": [],
+    }
+
+
+class IngestionJobManager:
+    """
+    Runs CSV ingestion jobs on a bounded worker pool and keeps their progress for polling.
+
+    Workers update a job through `update()`; readers get consistent copies through `get()`.
+    Finished jobs are dropped INGEST_JOB_RETENTION_SECONDS after they end.
+    """
+
+    def __init__(self, workers: int = INGEST_JOB_WORKERS, retention_seconds: float = INGEST_JOB_RETENTION_SECONDS):
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._spool_paths: Dict[str, str] = {} # Spooled upload of each job that has not started yet
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-job")
+        return self._executor
+
+    def _prune(self):
+        """Drops finished jobs past their retention. Caller holds the lock."""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and now - job["finished_at"] > self.retention_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _refresh_throughput(job: Dict[str, Any]):
+        if job["started_at"] is not None:
+            job["elapsed_seconds"] = (job["finished_at"] or time.time()) - job["started_at"]
+            job["rows_per_second"] = round(job["rows_ingested"] / job["elapsed_seconds"], 1) if job["elapsed_seconds"] > 0 else 0.0
+
+    def submit(self, filename: str, table_name: str, func: Callable[..., Any], *args, spool_path: str | None = None) -> str:
+        """
+        Registers a job and queues `func(job_id, *args)` on the worker pool. Returns the job id.
+        An exception escaping `func` marks the job as failed. Once `func` starts, it owns `spool_path`
+        (the uploaded file); if the job never starts, shutdown() deletes it.
+
+        Raises:
+            ValueError: If an unfinished job already writes to `table_name`.
+        """
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job["table_name"] == table_name and job["phase"] not in FINISHED_PHASES:
+                    raise ValueError(f"Table '{table_name}' is already being ingested by job {job['job_id']}.")
+            self._jobs[job_id] = new_job_state(job_id, filename, table_name)
+            if spool_path:
+                self._spool_paths[job_id] = spool_path
+        self._get_executor().submit(self._run, job_id, func, *args)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[..., Any], *args):
+        # Claim the job under the lock, so shutdown() cannot fail it and delete its file as it starts
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["phase"] != QUEUED:
+                return
+            self._spool_paths.pop(job_id, None)
+            job.update(phase=PARSING, message="Ingestion started.", started_at=time.time())
+        try:
+            func(job_id, *args)
+        except Exception as e:
+            print(f"❌ Ingestion job {job_id} failed: {e}")
+            self.finish(job_id, FAILED, f"Ingestion failed: {e}", error=str(e))
+
+    def update(self, job_id: str, **fields):
+        """Sets fields of a running job and refreshes its elapsed time and throughput."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            self._refresh_throughput(job)
+
+    def add_step(self, job_id: str, agent_name: str, status_msg: str, details_msg: str | dict, time_taken_step: float):
+        """Appends a processing step, in the same shape /upload-csv used to return."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["processing_steps"].append({
+                    "agent": agent_name, "status": status_msg, "details": details_msg, "time_taken": time_taken_step
+                })
+
+    def finish(self, job_id: str, phase: str, message: str, error: str | None = None):
+        """Moves a job to a finished phase."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and error:
+                job["errors"].append(error)
+        self.update(job_id, phase=phase, message=message, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of a job's state, or None if it is unknown or expired."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._refresh_throughput(job)
+            return dict(job, errors=list(job["errors"]), processing_steps=list(job["processing_steps"]))
+
+    def list_jobs(self) -> list[Dict[str, Any]]:
+        """Returns copies of every retained job, newest first."""
+        with self._lock:
+            job_ids = list(self._jobs)
+        jobs = [job for job in (self.get(job_id) for job_id in job_ids) if job is not None]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            phases: Dict[str, int] = {}
+            for job in self._jobs.values():
+                phases[job["phase"]] = phases.get(job["phase"], 0) + 1
+            return {"workers": self.workers, "jobs": len(self._jobs), "phases": phases}
+
+    def shutdown(self):
+        """
+        Stops accepting jobs. Called on application shutdown; running jobs are not interrupted.
+        Jobs still waiting in the queue are marked failed and their spooled uploads deleted.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job["phase"] == QUEUED]
+            for job in queued:
+                job.update(phase=FAILED, message="Server shut down before ingestion started.", finished_at=time.time())
+                job["errors"].append("Server shut down before ingestion started.")
+            spool_paths = [self._spool_paths.pop(job["job_id"]) for job in queued if job["job_id"] in self._spool_paths]
+        for spool_path in spool_paths:
+            try:
+                os.remove(spool_path)
+            except OSError as e:
+                print(f"⚠️ Could not delete spooled upload {spool_path}: {e}")
+
+
+# Shared instance used by /upload-csv and /upload-jobs
+ingestion_jobs = IngestionJobManager()
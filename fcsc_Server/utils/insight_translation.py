@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, Any
+
+from fastapi import HTTPException, status
+
+from translation import translate_text_to_ar
+
+# English run-state key -> Arabic run-state key for each translatable insight
+ARABIC_INSIGHT_KEYS = {
+    "current_summary_insights_eng": "current_summary_insights_ar",
+    "current_data_insights_eng": "current_data_insights_ar",
+}
+
+
+async def get_arabic_insight(run: Dict[str, Any], eng_key: str) -> str | None:
+    """
+    Returns the Arabic version of an English insight of a run, translating it on first use.
+
+    The translation is memoized in the run, and concurrent callers for the same insight share a
+    single in-flight translation. English-only runs therefore never pay for Arabic translation.
+
+    Args:
+        run (Dict[str, Any]): The run state.
+        eng_key (str): "current_summary_insights_eng" or "current_data_insights_eng".
+
+    Returns:
+        str | None: The Arabic text, or None if the run has no English insight to translate.
+    """
+    ar_key = ARABIC_INSIGHT_KEYS[eng_key]
+    if run.get(ar_key) is not None:
+        return run[ar_key]
+    if run.get(eng_key) is None:
+        return None
+
+    tasks = run.setdefault("translation_tasks", {})
+    task = tasks.get(ar_key)
+    if task is None:
+        task = asyncio.ensure_future(translate_text_to_ar(run[eng_key]))
+        tasks[ar_key] = task
+    try:
+        # shield() keeps one caller's cancellation from cancelling the translation for the others
+        translated = await asyncio.shield(task)
+    finally:
+        if task.done():
+            tasks.pop(ar_key, None)
+    run[ar_key] = translated
+    return translated
+
+
+async def require_arabic_insight(run: Dict[str, Any], eng_key: str) -> str | None:
+    """
+    get_arabic_insight() for request handlers: a failed or timed-out translation becomes a 502
+    with a detail message instead of an unhandled 500. The failed translation is not memoized,
+    so the next request tries again.
+
+    Raises:
+        HTTPException: 502 if the translation service failed.
+    """
+    try:
+        return await get_arabic_insight(run, eng_key)
+    except Exception as e: # googletrans errors, asyncio.TimeoutError from TRANSLATOR_TIMEOUT_SECONDS
+        detail = str(e) or type(e).__name__
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Arabic translation failed: {detail}. Try again, or request the English version."
+        )
+
+
+async def translate_all_insights(run: Dict[str, Any]):
+    """
+    Translates the summary and data insights of a run to Arabic concurrently.
+    """
+    await asyncio.gather(*(get_arabic_insight(run, eng_key) for eng_key in ARABIC_INSIGHT_KEYS))
@@ -0,0 +1,98 @@
+import os
+import time
+import threading
+from typing import Dict, Any
+
+from flotorch.sdk.llm import FlotorchLLM
+from dotenv import load_dotenv
+load_dotenv()
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of FlotorchLLM clients shared by all agents.
+
+    One client is built per model id and reused for every call, so the underlying
+    HTTP session (and its keep-alive connections) survives across pipeline stages
+    and requests instead of being rebuilt for every agent invocation.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, FlotorchLLM] = {}
+        self._overrides: Dict[str, Dict[str, str]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, model_id: str, api_key: str = None, base_url: str = None):
+        """
+        Registers per-model connection settings. Any cached client for the model is dropped
+        so the next get() picks up the new settings.
+
+        Args:
+            model_id (str): The Flotorch model id (e.g. "flotorch/<your-model-id>").
+            api_key (str): API key to use for this model. Defaults to FLOTORCH_API_KEY.
+            base_url (str): Gateway URL to use for this model. Defaults to FLOTORCH_BASE_URL.
+        """
+        with self._lock:
+            self._overrides[model_id] = {"api_key": api_key, "base_url": base_url}
+            self._clients.pop(model_id, None)
+
+    def get(self, model_id: str = None) -> FlotorchLLM:
+        """
+        Returns the shared client for the given model id, creating it on first use.
+
+        Args:
+            model_id (str): The model id. Defaults to the FLOTORCH_MODEL environment variable.
+
+        Returns:
+            FlotorchLLM: The pooled client.
+        """
+        model_id = model_id or os.getenv("FLOTORCH_MODEL")
+        with self._lock:
+            stats = self._stats.setdefault(model_id, {"created": 0, "reused": 0, "created_at": None, "last_used_at": None})
+            client = self._clients.get(model_id)
+            if client is None:
+                override = self._overrides.get(model_id, {})
+                client = FlotorchLLM(
+                    model_id=model_id,
+                    api_key=override.get("api_key") or os.getenv("FLOTORCH_API_KEY"),
+                    base_url=override.get("base_url") or os.getenv("FLOTORCH_BASE_URL")
+                )
+                self._clients[model_id] = client
+                stats["created"] += 1
+                stats["created_at"] = time.time()
+            else:
+                stats["reused"] += 1
+            stats["last_used_at"] = time.time()
+            return client
+
+    def clear(self):
+        """Drops all cached clients. The next get() for each model builds a fresh client."""
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns pool statistics per model id.
+
+        Returns:
+            Dict[str, Any]: Number of live clients and, per model, how many clients were created
+                            and how many calls reused an existing one.
+        """
+        with self._lock:
+            return {
+                "live_clients": len(self._clients),
+                "models": {
+                    model_id: dict(model_stats, live=model_id in self._clients)
+                    for model_id, model_stats in self._stats.items()
+                }
+            }
+
+
+# Shared instance used by every agent
+llm_registry = LLMClientRegistry()
+
+
+def get_llm_client(model_id: str = None) -> FlotorchLLM:
+    """Shortcut for llm_registry.get(model_id)."""
+    return llm_registry.get(model_id)
@@ -0,0 +1,132 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with LRU eviction, optional TTL and optional memory budget.
+
+    Entries are evicted (least recently used first) when there are more than `max_entries`,
+    when their age exceeds `ttl_seconds`, or when the summed size of all entries exceeds
+    `max_bytes`. Entry sizes come from `size_fn` and are taken when the entry is stored.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float | None = None,
+                 max_bytes: int | None = None, size_fn: Callable[[Any], int] | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._size_fn = size_fn or (lambda value: 0)
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry["stored_at"] > self.ttl_seconds
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry["size"]
+
+    def _evict(self, keep: Hashable = None):
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if self._is_expired(e, now)]:
+            self._remove(key)
+            self.evictions += 1
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break # Never evict the entry that was just stored, even if it alone exceeds the budget
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for key (marking it most recently used) or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry, time.time()):
+                if entry is not None:
+                    self._remove(key)
+                    self.evictions += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Like get(), but does not touch recency or hit/miss counters.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry, time.time()):
+                return default
+            return entry["value"]
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Stores value under key and evicts entries until the limits are respected again.
+        Storing an existing key again also refreshes its size and TTL.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            size = int(self._size_fn(value) or 0)
+            self._entries[key] = {"value": value, "stored_at": time.time(), "size": size}
+            self._total_bytes += size
+            self._evict(keep=key)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key]["value"]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters and current occupancy.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_MISSING = object()
@@ -1,20 +1,27 @@
 from models.common import AgentStep
 from typing import Dict, Any
 
-def _add_processing_step(app_state: Dict[str, Any], agent_name: str, status: str, details: str | dict | list | None, time_taken: float):
+def _add_processing_step(app_state: Dict[str, Any], agent_name: str, status: str, details: str | dict | list | None, time_taken: float,
+                         schema_source: str | None = None, cache_hit: bool | None = None):
     """
-    Helper function to add a new step to the global processing_steps log.
+    Helper function to add a new step to a run's processing_steps log.
 
     Args:
-        app_state (Dict[str, Any]): The global application state dictionary.
+        app_state (Dict[str, Any]): The run state dictionary (see utils/run_store.py).
         agent_name (str): The name of the agent or process.
         status (str): The status of the step (e.g., "✅ Success", "❌ Failed").
         details (str | dict | list | None): Detailed information about the step.
         time_taken (float): The time taken for this step in seconds.
+        schema_source (str | None): "cached" or "fresh" if the step used the database schema.
+        cache_hit (bool | None): True if the step was answered from a cache.
 
     Returns:
         AgentStep: The created AgentStep object.
     """
-    step = AgentStep(agent=agent_name, status=status, details=details, time_taken=time_taken)
+    step = AgentStep(agent=agent_name, status=status, details=details, time_taken=time_taken,
+                     schema_source=schema_source, cache_hit=cache_hit)
     app_state["processing_steps"].append(step)
+    step_listener = app_state.get("step_listener") # Set by /query-process-stream to push steps to the client
+    if step_listener is not None:
+        step_listener(step)
     return step # Return the created step for convenience
@@ -0,0 +1,71 @@
+import os
+import re
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+
+load_dotenv()
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a natural-language query for cache lookups: case-folded, punctuation removed
+    and whitespace collapsed, so "Total sales by region?" and "total  sales by region" match.
+    """
+    query = re.sub(r"[^\w\s]", " ", query.casefold())
+    return " ".join(query.split())
+
+
+def query_cache_key(query: str, schema_fingerprint: str) -> str:
+    """
+    Builds the cache key from the normalized English query and the schema fingerprint,
+    so any schema change (new upload, altered table) misses the cache.
+    """
+    return f"{schema_fingerprint}:{normalize_query(query)}"
+
+
+class QueryAnswerCache:
+    """
+    NL -> SQL answer cache placed in front of the Selector, Decomposer and Refiner agents.
+    Entries hold the agents' outputs and are only stored once the SQL executed successfully.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+                 enabled: bool = QUERY_CACHE_ENABLED):
+        self.enabled = enabled
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def get(self, query: str, schema_fingerprint: str | None) -> Dict[str, Any] | None:
+        """
+        Returns the cached answer ({"sql", "explanation", "needs_decomposition", "decomposition"}) or None.
+        """
+        if not self.enabled or not schema_fingerprint:
+            return None
+        return self._cache.get(query_cache_key(query, schema_fingerprint))
+
+    def put(self, query: str, schema_fingerprint: str | None, sql: str, explanation: str,
+            needs_decomposition: bool, decomposition: dict | str | None):
+        if not self.enabled or not schema_fingerprint:
+            return
+        self._cache.set(query_cache_key(query, schema_fingerprint), {
+            "sql": sql,
+            "explanation": explanation,
+            "needs_decomposition": needs_decomposition,
+            "decomposition": decomposition,
+        })
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._cache.stats(), enabled=self.enabled)
+
+
+# Shared instance used by /query-process
+query_cache = QueryAnswerCache()
@@ -0,0 +1,130 @@
+import os
+import threading
+from typing import Dict, Any, List
+
+import pandas as pd
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+from utils.sql_validator import SQL_VALIDATION_DIALECT
+
+load_dotenv()
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MEMORY_BUDGET_MB = float(os.getenv("RESULT_CACHE_MEMORY_BUDGET_MB", "256"))
+# Upper bound on staleness for changes made outside this server (uploads through /upload-csv invalidate immediately)
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "600"))
+
+
+def analyze_sql(sql_query: str) -> tuple[str, List[str]] | None:
+    """
+    Normalizes a query for cache lookups and lists the tables it reads.
+
+    Returns:
+        tuple[str, List[str]] | None: The canonical SQL text (formatting, keyword case and trailing
+        semicolons removed) and the sorted, lower-cased table names; None if the SQL cannot be parsed.
+    """
+    try:
+        statement = sqlglot.parse_one(sql_query, read=SQL_VALIDATION_DIALECT)
+    except SqlglotError:
+        return None
+    if statement is None:
+        return None
+    cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+    tables = sorted({t.name.lower() for t in statement.find_all(exp.Table) if t.name and t.name.lower() not in cte_names})
+    return statement.sql(dialect=SQL_VALIDATION_DIALECT), tables
+
+
+class TableVersions:
+    """
+    Per-table data versions. Bumping a table's version makes every cached result that read it unreachable.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0 # Bumped to invalidate every table at once
+        self._lock = threading.Lock()
+
+    def get(self, table_name: str) -> str:
+        with self._lock:
+            return f"{self._epoch}.{self._versions.get(table_name.lower(), 0)}"
+
+    def bump(self, table_name: str):
+        with self._lock:
+            self._versions[table_name.lower()] = self._versions.get(table_name.lower(), 0) + 1
+
+    def bump_all(self):
+        with self._lock:
+            self._epoch += 1
+
+
+class ResultCache:
+    """
+    Cache of query results (DataFrames) keyed on the normalized SQL text plus the data version
+    of every table the query reads. LRU-evicted within an entry count and a byte budget.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, memory_budget_mb: float = RESULT_CACHE_MEMORY_BUDGET_MB,
+                 ttl_seconds: float = RESULT_CACHE_TTL_SECONDS, enabled: bool = RESULT_CACHE_ENABLED):
+        self.enabled = enabled
+        self.versions = TableVersions()
+        self._cache = LRUCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=int(memory_budget_mb * 1024 * 1024),
+            size_fn=lambda df: int(df.memory_usage(deep=True).sum()),
+        )
+
+    def _key(self, sql_query: str) -> str | None:
+        analyzed = analyze_sql(sql_query)
+        if analyzed is None:
+            return None
+        normalized_sql, tables = analyzed
+        return normalized_sql + "|" + ",".join(f"{table}@{self.versions.get(table)}" for table in tables)
+
+    def get(self, sql_query: str) -> pd.DataFrame | None:
+        """
+        Returns a copy of the cached result for the query, or None.
+        """
+        if not self.enabled:
+            return None
+        key = self._key(sql_query)
+        if key is None:
+            return None
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        result_df = cached.copy() # Callers (e.g. PDF generation) may modify the DataFrame in place
+        result_df.attrs = dict(cached.attrs)
+        return result_df
+
+    def put(self, sql_query: str, result_df: pd.DataFrame):
+        if not self.enabled or result_df is None:
+            return
+        key = self._key(sql_query)
+        if key is None:
+            return
+        stored = result_df.copy()
+        stored.attrs = dict(result_df.attrs)
+        self._cache.set(key, stored)
+
+    def invalidate_table(self, table_name: str):
+        """
+        Call when a table's data changed (e.g. a CSV upload).
+        """
+        self.versions.bump(table_name)
+
+    def invalidate_all(self):
+        self.versions.bump_all()
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._cache.stats(), enabled=self.enabled)
+
+
+# Shared instance used by /query-process
+result_cache = ResultCache()
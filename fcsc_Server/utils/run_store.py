@@ -0,0 +1,155 @@
+import os
+import sys
+import uuid
+import threading
+from typing import Dict, Any, Optional
+
+import pandas as pd
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+
+load_dotenv()
+
+RUN_STORE_MAX_RUNS = int(os.getenv("RUN_STORE_MAX_RUNS", "100"))
+RUN_STORE_TTL_SECONDS = float(os.getenv("RUN_STORE_TTL_SECONDS", "3600"))
+RUN_STORE_MEMORY_BUDGET_MB = float(os.getenv("RUN_STORE_MEMORY_BUDGET_MB", "512"))
+
+
+def new_run_state(run_id: str, query: str) -> Dict[str, Any]:
+    """
+    Builds the state dictionary for a single /query-process run.
+
+    Args:
+        run_id (str): The unique id of the run.
+        query (str): The user's original query (English or Arabic).
+
+    Returns:
+        Dict[str, Any]: A fresh run state with every output unset.
+    """
+    return {
+        "run_id": run_id,
+        "last_query_processed": query, # The original user query (English or Arabic)
+        "last_query_processed_english": None, # English version of the query
+        "last_query_processed_arabic": None, # Arabic version of the query (if applicable)
+        "processing_steps": [], # Log of steps for this run
+        "schema_fingerprint": None, # Fingerprint of the schema the agents saw
+        "schema_retrieval": None, # Which tables were kept in the agent prompts, and the token savings
+
+        # Detailed outputs of each stage for the individual GET endpoints
+        "last_schema_loader_run": None,
+        "last_selector_agent_run": None,
+        "last_decomposer_agent_run": None,
+        "last_refiner_agent_run": None,
+        "last_db_execution_run": None,
+        "last_visualization_agent_run": None,
+
+        # Key data pieces often referenced
+        "last_sql_generated": None, # From Refiner
+        "last_result_df": None,     # From DB Execution
+        "result_truncated": False,  # True if the row cap cut the result short
+        "result_arrow_table": None, # Arrow version of last_result_df, built on first Arrow/Parquet download
+        "current_summary_insights_eng": None,
+        "current_summary_insights_ar": None,
+        "current_data_insights_eng": None,
+        "current_data_insights_ar": None,
+        "translation_tasks": {}, # In-flight on-demand Arabic translations (see utils/insight_translation.py)
+        "last_suggested_visualization": "Table", # From Visualization
+        "last_decomposition": None # From Decomposer (if run)
+    }
+
+
+def estimate_run_size(run: Dict[str, Any]) -> int:
+    """
+    Roughly estimates the memory held by a run, dominated by its result DataFrame.
+    """
+    size = 0
+    for value in run.values():
+        if isinstance(value, pd.DataFrame):
+            size += int(value.memory_usage(deep=True).sum())
+        elif isinstance(value, str):
+            size += sys.getsizeof(value)
+    if run.get("result_arrow_table") is not None:
+        size += int(run["result_arrow_table"].nbytes)
+    for step in run.get("processing_steps") or []:
+        size += sys.getsizeof(str(step.details))
+    return size
+
+
+class RunStore:
+    """
+    Keeps the state of recent /query-process runs keyed by run id, so concurrent users
+    never read each other's results. Runs are evicted by LRU, TTL and a memory budget.
+    """
+
+    def __init__(self, max_runs: int = RUN_STORE_MAX_RUNS, ttl_seconds: float = RUN_STORE_TTL_SECONDS,
+                 memory_budget_mb: float = RUN_STORE_MEMORY_BUDGET_MB):
+        self._runs = LRUCache(
+            max_entries=max_runs,
+            ttl_seconds=ttl_seconds,
+            max_bytes=int(memory_budget_mb * 1024 * 1024),
+            size_fn=estimate_run_size
+        )
+        self._latest_run_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def create(self, query: str) -> Dict[str, Any]:
+        """
+        Creates and stores a new run for the given query.
+
+        Returns:
+            Dict[str, Any]: The new run state. Its "run_id" key holds the generated id.
+        """
+        run_id = uuid.uuid4().hex
+        run = new_run_state(run_id, query)
+        self._runs.set(run_id, run)
+        with self._lock:
+            self._latest_run_id = run_id
+        return run
+
+    def save(self, run: Dict[str, Any]):
+        """
+        Re-stores a run after the pipeline has filled it in, so its size is re-measured
+        against the memory budget and its TTL restarts.
+        """
+        self._runs.set(run["run_id"], run)
+
+    def get(self, run_id: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the run with the given id, or the most recently created run if no id is given.
+        Returns None if the run does not exist or has been evicted.
+        """
+        if run_id is None:
+            with self._lock:
+                run_id = self._latest_run_id
+            if run_id is None:
+                return None
+        return self._runs.get(run_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._runs.stats()
+
+
+# Shared instance used by all routers
+run_store = RunStore()
+
+
+def resolve_run(run_id: str | None) -> Optional[Dict[str, Any]]:
+    """
+    Looks up the run a GET endpoint should serve.
+
+    Args:
+        run_id (str | None): The run id returned by /query-process. If omitted,
+                             the most recent run is used.
+
+    Returns:
+        Optional[Dict[str, Any]]: The run state, or None if no run id was given and no run exists yet.
+
+    Raises:
+        HTTPException: 404 if an explicit run id is unknown or has been evicted.
+    """
+    run = run_store.get(run_id)
+    if run is None and run_id is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run '{run_id}' not found or has expired. Run /query-process again.")
+    return run
@@ -0,0 +1,116 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+from agents.schema_loader_agent import SchemaLoaderAgent
+
+load_dotenv()
+
+SCHEMA_CACHE_TTL_SECONDS = float(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "300"))
+
+
+def schema_fingerprint(schema_string: str) -> str:
+    """
+    Returns a short content hash of a rendered schema string. Two identical schemas share a fingerprint,
+    so it can be used as the schema version in other cache keys.
+    """
+    return hashlib.sha256(schema_string.encode("utf-8")).hexdigest()[:16]
+
+
+def is_schema_error(schema_string: str | None) -> bool:
+    """
+    True if the schema loader returned an error message or an empty schema instead of a schema.
+    """
+    return not schema_string or "Error" in schema_string
+
+
+class SchemaCache:
+    """
+    Holds the rendered database schema string and its fingerprint, so /query-process does not
+    reload the schema from the database on every request.
+
+    The cached schema is refreshed when it is older than `ttl_seconds`, when a caller asks for
+    a forced refresh, or after invalidate() (called by /upload-csv once a table is created).
+    Failed loads are never cached.
+    """
+
+    def __init__(self, ttl_seconds: float = SCHEMA_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._schema_string: str | None = None
+        self._fingerprint: str | None = None
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._schema_string is not None
+            and self._loaded_at is not None
+            and time.time() - self._loaded_at <= self.ttl_seconds
+        )
+
+    def get(self, force_refresh: bool = False) -> tuple[str, str | None, bool, float]:
+        """
+        Returns the schema, loading it from the database only when needed.
+
+        Args:
+            force_refresh (bool): Reload from the database even if the cached schema is still fresh.
+
+        Returns:
+            tuple[str, str | None, bool, float]: A tuple containing:
+                                     - str: The schema string (or the loader's error message).
+                                     - str | None: The schema fingerprint (None if loading failed).
+                                     - bool: True if the schema was served from the cache.
+                                     - float: The time taken in seconds.
+        """
+        start_time = time.time()
+        with self._lock:
+            if not force_refresh and self._is_fresh():
+                self.hits += 1
+                return self._schema_string, self._fingerprint, True, time.time() - start_time
+
+            schema_string, _ = SchemaLoaderAgent.load_schema_from_db()
+            self.loads += 1
+            if is_schema_error(schema_string):
+                return schema_string, None, False, time.time() - start_time
+
+            self._schema_string = schema_string
+            self._fingerprint = schema_fingerprint(schema_string)
+            self._loaded_at = time.time()
+            return schema_string, self._fingerprint, False, time.time() - start_time
+
+    def invalidate(self):
+        """
+        Drops the cached schema. The next get() reloads it from the database.
+        """
+        with self._lock:
+            self._schema_string = None
+            self._fingerprint = None
+            self._loaded_at = None
+            self.invalidations += 1
+
+    @property
+    def fingerprint(self) -> str | None:
+        return self._fingerprint
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached": self._schema_string is not None,
+                "fingerprint": self._fingerprint,
+                "age_seconds": time.time() - self._loaded_at if self._loaded_at else None,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared instance used by startup, /query-process, /upload-csv and /schema
+schema_cache = SchemaCache()
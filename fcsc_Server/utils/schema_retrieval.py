@@ -0,0 +1,244 @@
+import os
+import re
+import math
+import difflib
+import threading
+from collections import Counter
+from typing import Dict, Any, List
+
+from dotenv import load_dotenv
+
+from database import build_schema_string
+
+load_dotenv()
+
+SCHEMA_RETRIEVAL_ENABLED = os.getenv("SCHEMA_RETRIEVAL_ENABLED", "true").lower() == "true"
+SCHEMA_RETRIEVAL_TOP_K = int(os.getenv("SCHEMA_RETRIEVAL_TOP_K", "5"))
+# Below this best-table BM25 score the match is considered too weak to prune the schema
+SCHEMA_RETRIEVAL_MIN_SCORE = float(os.getenv("SCHEMA_RETRIEVAL_MIN_SCORE", "1.0"))
+# Share of the query terms found anywhere in the schema that the selected tables must cover
+SCHEMA_RETRIEVAL_MIN_COVERAGE = float(os.getenv("SCHEMA_RETRIEVAL_MIN_COVERAGE", "0.8"))
+
+_TABLE_RE = re.compile(r"Table:\s*(.+?)\s*\(\n(.*?)\n\);", re.DOTALL)
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "from", "by", "with", "and", "or", "is", "are",
+    "was", "were", "be", "me", "my", "show", "list", "give", "get", "find", "display", "what", "which",
+    "who", "whose", "how", "many", "much", "each", "every", "all", "per", "that", "this", "these",
+    "those", "do", "does", "did", "please", "i", "we", "our", "it", "its", "as", "at", "than", "there",
+}
+
+# Business vocabulary that users and CSV headers commonly disagree on
+_SYNONYMS = {
+    "revenue": ["sales", "income", "turnover", "amount"],
+    "sale": ["revenue", "order", "transaction"],
+    "customer": ["client", "user", "buyer", "account"],
+    "client": ["customer"],
+    "employee": ["staff", "worker", "personnel", "emp"],
+    "staff": ["employee"],
+    "salary": ["pay", "wage", "compensation"],
+    "product": ["item", "goods", "sku"],
+    "item": ["product"],
+    "price": ["cost", "amount", "rate"],
+    "cost": ["price", "expense", "expenditure"],
+    "expense": ["cost", "expenditure", "spending"],
+    "quantity": ["qty", "count", "units", "volume"],
+    "region": ["area", "location", "country", "city", "emirate", "state"],
+    "country": ["nation", "region"],
+    "department": ["dept", "division", "unit"],
+    "date": ["time", "day", "month", "year", "period"],
+    "year": ["date", "period"],
+    "category": ["type", "class", "group", "sector"],
+    "population": ["people", "resident", "inhabitant"],
+    "profit": ["margin", "earning", "income"],
+    "trade": ["import", "export"],
+}
+
+
+def _stem(token: str) -> str:
+    """
+    Very light English stemming: strips common plural endings so "sales" matches "sale".
+    """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ses", "xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits identifiers and free text into lowercase, lightly stemmed terms.
+    Handles snake_case, camelCase and quoted/numeric column names.
+    """
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    tokens = re.split(r"[^A-Za-z0-9]+", text.lower())
+    return [_stem(token) for token in tokens if token and token not in _STOPWORDS]
+
+
+def parse_schema_string(schema_string: str) -> Dict[str, List[tuple]]:
+    """
+    Parses a schema string rendered by database.build_schema_string.
+
+    Returns:
+        Dict[str, List[tuple]]: Table name -> list of (column_name, data_type), in schema order.
+    """
+    tables: Dict[str, List[tuple]] = {}
+    for table_name, body in _TABLE_RE.findall(schema_string or ""):
+        columns = []
+        for line in body.split("\n"):
+            line = line.strip().rstrip(",")
+            if not line:
+                continue
+            col_name, _, col_type = line.partition(" ") # Types may contain spaces ("double precision")
+            columns.append((col_name.strip(), col_type.strip()))
+        tables[table_name.strip()] = columns
+    return tables
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token estimate (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class SchemaIndex:
+    """
+    BM25 index over table and column names of one schema. Each table is one document;
+    table-name terms are counted twice so they outweigh incidental column matches.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, tables: Dict[str, List[tuple]]):
+        self.tables = tables
+        self.doc_terms: Dict[str, Counter] = {}
+        for table_name, columns in tables.items():
+            terms = tokenize(table_name) * 2
+            for col_name, _ in columns:
+                terms.extend(tokenize(col_name))
+            self.doc_terms[table_name] = Counter(terms)
+        self.doc_len = {name: sum(terms.values()) for name, terms in self.doc_terms.items()}
+        self.avg_doc_len = (sum(self.doc_len.values()) / len(self.doc_len)) if self.doc_len else 0.0
+        doc_freq = Counter()
+        for terms in self.doc_terms.values():
+            doc_freq.update(terms.keys())
+        n_docs = len(self.doc_terms)
+        self.idf = {term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+        self.vocabulary = list(self.idf.keys())
+
+    def expand_query(self, query: str) -> Dict[str, float]:
+        """
+        Maps a natural-language query to weighted index terms: exact terms (1.0),
+        synonyms (0.7) and fuzzy matches for misspellings (0.6).
+        """
+        weights: Dict[str, float] = {}
+
+        def _add(term: str, weight: float):
+            if term in self.idf and weights.get(term, 0.0) < weight:
+                weights[term] = weight
+
+        for term in tokenize(query):
+            _add(term, 1.0)
+            for synonym in _SYNONYMS.get(term, []):
+                _add(_stem(synonym), 0.7)
+            if term not in self.idf and len(term) > 3:
+                for close in difflib.get_close_matches(term, self.vocabulary, n=2, cutoff=0.8):
+                    _add(close, 0.6)
+        return weights
+
+    def score(self, query_weights: Dict[str, float]) -> Dict[str, float]:
+        scores = {}
+        for table_name, terms in self.doc_terms.items():
+            norm = self.K1 * (1 - self.B + self.B * self.doc_len[table_name] / (self.avg_doc_len or 1))
+            total = 0.0
+            for term, weight in query_weights.items():
+                tf = terms.get(term, 0)
+                if tf:
+                    total += weight * self.idf[term] * tf * (self.K1 + 1) / (tf + norm)
+            scores[table_name] = total
+        return scores
+
+
+_index_cache: Dict[str, SchemaIndex] = {}
+_index_lock = threading.Lock()
+
+
+def _get_index(schema_string: str, fingerprint: str | None) -> SchemaIndex:
+    key = fingerprint or str(hash(schema_string))
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is None:
+            _index_cache.clear() # Only the current schema version is ever queried
+            index = SchemaIndex(parse_schema_string(schema_string))
+            _index_cache[key] = index
+        return index
+
+
+def select_relevant_schema(query: str, schema_string: str, fingerprint: str | None = None,
+                           top_k: int = SCHEMA_RETRIEVAL_TOP_K) -> tuple[str, Dict[str, Any]]:
+    """
+    Returns a schema string restricted to the tables most relevant to the query.
+
+    Falls back to the full schema when retrieval is disabled, when the schema already has
+    no more than top_k tables, or when the match is not confident enough (weak best score,
+    or query terms that only match tables outside the top_k).
+
+    Args:
+        query (str): The English user query.
+        schema_string (str): The full rendered schema.
+        fingerprint (str | None): Schema fingerprint, used to reuse the index across requests.
+        top_k (int): Maximum number of tables to keep.
+
+    Returns:
+        tuple[str, Dict[str, Any]]: The schema string to give the agents, and a report with the
+                                    selected tables, scores, confidence and estimated token savings.
+    """
+    full_tokens = estimate_tokens(schema_string)
+    report: Dict[str, Any] = {"applied": False, "selected_tables": None, "full_schema_tokens": full_tokens, "prompt_schema_tokens": full_tokens, "tokens_saved": 0}
+
+    if not SCHEMA_RETRIEVAL_ENABLED:
+        report["reason"] = "Retrieval disabled."
+        return schema_string, report
+
+    index = _get_index(schema_string, fingerprint)
+    report["total_tables"] = len(index.tables)
+    if len(index.tables) <= top_k:
+        report["reason"] = f"Schema has {len(index.tables)} tables (<= top_k={top_k}); using full schema."
+        return schema_string, report
+
+    query_weights = index.expand_query(query)
+    scores = index.score(query_weights)
+    ranked = sorted((item for item in scores.items() if item[1] > 0), key=lambda item: item[1], reverse=True)
+    selected = [name for name, _ in ranked[:top_k]]
+
+    matched_terms = {term for term in query_weights if any(index.doc_terms[name].get(term) for name in index.tables)}
+    covered_terms = {term for term in matched_terms if any(index.doc_terms[name].get(term) for name in selected)}
+    coverage = len(covered_terms) / len(matched_terms) if matched_terms else 0.0
+    top_score = ranked[0][1] if ranked else 0.0
+    report.update({
+        "top_scores": {name: round(score, 3) for name, score in ranked[:top_k]},
+        "confidence": round(coverage, 3),
+    })
+
+    if not selected or top_score < SCHEMA_RETRIEVAL_MIN_SCORE or coverage < SCHEMA_RETRIEVAL_MIN_COVERAGE:
+        report["reason"] = f"Low retrieval confidence (top score {top_score:.2f}, coverage {coverage:.0%}); using full schema."
+        return schema_string, report
+
+    pruned_schema = build_schema_string([
+        (table_name, col_name, col_type)
+        for table_name in selected
+        for col_name, col_type in index.tables[table_name]
+    ])
+    pruned_tokens = estimate_tokens(pruned_schema)
+    report.update({
+        "applied": True,
+        "selected_tables": selected,
+        "prompt_schema_tokens": pruned_tokens,
+        "tokens_saved": full_tokens - pruned_tokens,
+        "reason": f"Kept {len(selected)} of {len(index.tables)} tables.",
+    })
+    print(f"Schema retrieval: kept {selected} of {len(index.tables)} tables, ~{full_tokens} -> ~{pruned_tokens} prompt tokens per agent call.")
+    return pruned_schema, report
@@ -0,0 +1,61 @@
+import os
+import threading
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# When true, the Refiner starts generating SQL (without decomposition) at the same time as the Selector
+SPECULATIVE_SQL_GENERATION = os.getenv("SPECULATIVE_SQL_GENERATION", "false").lower() == "true"
+
+
+class SpeculationStats:
+    """
+    Counts how often speculative SQL generation paid off.
+
+    A hit means the Selector said "answerable, no decomposition" and the speculative SQL was used.
+    A miss means the speculative SQL was discarded: the query was not answerable, it needed
+    decomposition, or the Selector or the speculative call itself failed or was cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses_not_answerable = 0
+        self.misses_needs_decomposition = 0
+        self.misses_failed = 0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, reason: str):
+        """
+        Args:
+            reason (str): "not_answerable", "needs_decomposition" or "failed".
+        """
+        with self._lock:
+            if reason == "not_answerable":
+                self.misses_not_answerable += 1
+            elif reason == "needs_decomposition":
+                self.misses_needs_decomposition += 1
+            else:
+                self.misses_failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            misses = self.misses_not_answerable + self.misses_needs_decomposition + self.misses_failed
+            total = self.hits + misses
+            return {
+                "enabled": SPECULATIVE_SQL_GENERATION,
+                "hits": self.hits,
+                "misses": misses,
+                "misses_not_answerable": self.misses_not_answerable,
+                "misses_needs_decomposition": self.misses_needs_decomposition,
+                "misses_failed": self.misses_failed,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Shared counters for /metrics/speculation
+speculation_stats = SpeculationStats()
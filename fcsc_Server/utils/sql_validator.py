@@ -0,0 +1,146 @@
+import os
+import time
+import difflib
+from functools import lru_cache
+from typing import Dict, List, Set
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, SqlglotError
+from dotenv import load_dotenv
+
+from backends import DB_BACKEND
+from utils.schema_retrieval import parse_schema_string
+
+load_dotenv()
+
+SQL_VALIDATION_ENABLED = os.getenv("SQL_VALIDATION_ENABLED", "true").lower() == "true"
+# sqlglot dialect used to parse generated SQL
+SQL_VALIDATION_DIALECT = os.getenv("SQL_VALIDATION_DIALECT", "sqlite" if DB_BACKEND == "sqlite" else "postgres")
+
+# Statement types a read-only query must never contain (looked up by name; some only exist in newer sqlglot versions)
+_WRITE_NODE_TYPES = tuple(
+    node_type for node_type in (
+        getattr(exp, name, None) for name in (
+            "Insert", "Update", "Delete", "Merge", "Create", "Drop", "Alter", "AlterTable",
+            "TruncateTable", "Command", "Into", "Grant", "Copy",
+        )
+    ) if node_type is not None
+)
+_QUERY_NODE_TYPES = (exp.Select, exp.Union, exp.Intersect, exp.Except)
+
+
+@lru_cache(maxsize=8)
+def _schema_columns(schema_string: str) -> Dict[str, Set[str]]:
+    """
+    Parses the schema string once per schema into lower-cased table -> column-name sets.
+    """
+    return {
+        table.lower(): {col.lower() for col, _ in columns}
+        for table, columns in parse_schema_string(schema_string).items()
+    }
+
+
+def _suggest(name: str, candidates) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=1, cutoff=0.6)
+    return f" Did you mean '{matches[0]}'?" if matches else ""
+
+
+def _check_read_only(statement: exp.Expression) -> List[str]:
+    root = statement.unnest() if isinstance(statement, exp.Subquery) else statement
+    if not isinstance(root, _QUERY_NODE_TYPES):
+        return [f"Only read-only SELECT queries are allowed, got a {root.key.upper()} statement."]
+    for node in root.find_all(*_WRITE_NODE_TYPES):
+        return [f"Only read-only SELECT queries are allowed; the query contains {node.key.upper()}."]
+    return []
+
+
+def _check_references(statement: exp.Expression, schema: Dict[str, Set[str]]) -> List[str]:
+    errors = []
+    cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+
+    # Table references: every physical table must exist in the schema
+    alias_to_table: Dict[str, str] = {} # Alias (or bare name) -> schema table
+    referenced_tables: Set[str] = set()
+    for table in statement.find_all(exp.Table):
+        name = table.name.lower()
+        if not name or name in cte_names:
+            continue
+        if table.db and table.db.lower() != "public":
+            continue # Other schemas (e.g. information_schema) are not described by the cached schema
+        if name not in schema:
+            errors.append(f"Unknown table '{table.name}'.{_suggest(name, schema)}")
+            continue
+        referenced_tables.add(name)
+        alias_to_table[name] = name
+        if table.alias:
+            alias_to_table[table.alias.lower()] = name
+
+    # Names that can legitimately appear as columns without belonging to a schema table:
+    # output aliases, CTE/derived-table column lists, and the aliases of derived sources
+    derived_aliases = set(cte_names)
+    output_names: Set[str] = {alias.alias.lower() for alias in statement.find_all(exp.Alias) if alias.alias}
+    for table_alias in statement.find_all(exp.TableAlias):
+        output_names.update(col.name.lower() for col in table_alias.columns)
+        if not isinstance(table_alias.parent, exp.Table) and table_alias.name:
+            derived_aliases.add(table_alias.name.lower())
+
+    known_columns: Set[str] = set()
+    for table in referenced_tables:
+        known_columns |= schema[table]
+
+    for column in statement.find_all(exp.Column):
+        if isinstance(column.this, exp.Star):
+            continue
+        col_name = column.name.lower()
+        qualifier = column.table.lower()
+        if qualifier:
+            if qualifier in alias_to_table:
+                table = alias_to_table[qualifier]
+                if col_name not in schema[table]:
+                    errors.append(f"Unknown column '{column.name}' in table '{table}'.{_suggest(col_name, schema[table])}")
+            elif qualifier not in derived_aliases:
+                errors.append(f"Unknown table or alias '{column.table}' in column reference '{column.sql()}'.")
+        elif col_name not in known_columns and col_name not in output_names:
+            tables = ", ".join(sorted(referenced_tables)) or "none"
+            errors.append(f"Unknown column '{column.name}' (referenced tables: {tables}).{_suggest(col_name, known_columns)}")
+
+    return list(dict.fromkeys(errors)) # Deduplicate, keep order
+
+
+def validate_sql(sql_query: str, schema_string: str) -> tuple[bool, List[str], float]:
+    """
+    Statically validates generated SQL before it is sent to the database: it must parse,
+    be a single read-only query, and only reference tables and columns that exist in the schema.
+
+    Args:
+        sql_query (str): The SQL generated by the Refiner Agent.
+        schema_string (str): The full cached database schema string.
+
+    Returns:
+        tuple[bool, List[str], float]: A tuple containing:
+                                       - bool: True if the SQL passed every check.
+                                       - List[str]: Precise error messages (empty if valid).
+                                       - float: The time taken in seconds.
+    """
+    start_time = time.time()
+    try:
+        statements = [s for s in sqlglot.parse(sql_query, read=SQL_VALIDATION_DIALECT) if s is not None]
+    except ParseError as e:
+        details = [
+            f"Syntax error at line {err.get('line')}, column {err.get('col')}: {err.get('description')}"
+            + (f" near '{err.get('highlight')}'" if err.get("highlight") else "")
+            for err in e.errors
+        ] or [f"Syntax error: {e}"]
+        return False, details, time.time() - start_time
+    except SqlglotError as e: # e.g. unterminated string literal
+        return False, [f"Syntax error: {e}"], time.time() - start_time
+
+    if len(statements) != 1:
+        return False, [f"Expected exactly one SQL statement, got {len(statements)}."], time.time() - start_time
+
+    statement = statements[0]
+    errors = _check_read_only(statement)
+    if not errors:
+        errors = _check_references(statement, _schema_columns(schema_string))
+    return not errors, errors, time.time() - start_time
@@ -0,0 +1,223 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+from utils.executor import run_blocking
+
+load_dotenv()
+
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "2048"))
+# SQLite file for the on-disk tier; set to an empty string to keep the cache in memory only
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.db")
+TRANSLATION_CACHE_DISK_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_DISK_MAX_ENTRIES", "50000"))
+
+# The on-disk tier is trimmed back to its limit once every this many writes
+_DISK_PRUNE_INTERVAL = 100
+# Disk hits refresh last_used in batches of this size (or with the next write), not one commit per read
+_TOUCH_FLUSH_BATCH = 64
+
+
+def translation_cache_key(text: str, dest: str) -> str:
+    """
+    Builds the cache key from the sha256 of the source text and the target language.
+    """
+    return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}:{dest}"
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: an in-memory LRU in front of a SQLite table that survives restarts.
+
+    Lookups try memory first, then disk (promoting disk hits into memory). The disk tier is
+    also trimmed least-recently-used first once it holds more than `disk_max_entries` rows.
+
+    Async code should use aget()/aput(): memory hits are answered inline, and disk reads and
+    writes run on the shared executor so they never block the event loop.
+    """
+
+    def __init__(self, path: str = TRANSLATION_CACHE_PATH, max_entries: int = TRANSLATION_CACHE_MAX_ENTRIES,
+                 disk_max_entries: int = TRANSLATION_CACHE_DISK_MAX_ENTRIES, enabled: bool = TRANSLATION_CACHE_ENABLED):
+        self.enabled = enabled
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self._memory = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self._pending_touches: Dict[str, float] = {} # Disk hits whose last_used is not written yet
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+        if self.enabled and self.path:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                # WAL with synchronous=NORMAL: commits don't fsync, and reads don't wait for writes
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " key TEXT PRIMARY KEY, dest TEXT NOT NULL, translated TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache: on-disk tier disabled ({e})")
+                self._conn = None
+
+    def _disk_get(self, key: str) -> str | None:
+        # Checked under the lock, so a concurrent close() cannot close the connection while it is in use
+        with self._lock:
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute("SELECT translated FROM translations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._pending_touches[key] = time.time()
+                    if len(self._pending_touches) >= _TOUCH_FLUSH_BATCH:
+                        self._flush_touches()
+                        self._conn.commit()
+                return row[0] if row else None
+            except sqlite3.Error as e:
+                print(f"Translation cache: disk read failed: {e}")
+                self.disk_errors += 1
+                return None
+
+    def _flush_touches(self):
+        """Writes the pending last_used updates in one statement. Caller holds the lock and commits."""
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+
+    def _disk_put(self, key: str, dest: str, translated: str):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO translations (key, dest, translated, last_used) VALUES (?, ?, ?, ?)",
+                    (key, dest, translated, time.time()),
+                )
+                self._writes += 1
+                self._flush_touches() # Before pruning, so recently read entries are not trimmed
+                if self._writes % _DISK_PRUNE_INTERVAL == 0:
+                    self._conn.execute(
+                        "DELETE FROM translations WHERE key IN ("
+                        " SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_entries,),
+                    )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache: disk write failed: {e}")
+                self.disk_errors += 1
+
+    def get(self, text: str, dest: str) -> str | None:
+        """
+        Returns the cached translation of text into dest, or None.
+        """
+        if not self.enabled:
+            return None
+        key = translation_cache_key(text, dest)
+        translated = self._memory.get(key)
+        if translated is not None:
+            self.memory_hits += 1
+            return translated
+        translated = self._disk_get(key)
+        if translated is not None:
+            self.disk_hits += 1
+            self._memory.set(key, translated)
+            return translated
+        self.misses += 1
+        return None
+
+    def put(self, text: str, dest: str, translated: str):
+        if not self.enabled or translated is None:
+            return
+        key = translation_cache_key(text, dest)
+        self._memory.set(key, translated)
+        self._disk_put(key, dest, translated)
+
+    async def aget(self, text: str, dest: str) -> str | None:
+        """
+        Async get(): the disk lookup runs on the shared executor.
+        """
+        if not self.enabled:
+            return None
+        key = translation_cache_key(text, dest)
+        translated = self._memory.get(key)
+        if translated is not None:
+            self.memory_hits += 1
+            return translated
+        translated = await run_blocking(self._disk_get, key) if self._conn is not None else None
+        if translated is not None:
+            self.disk_hits += 1
+            self._memory.set(key, translated)
+            return translated
+        self.misses += 1
+        return None
+
+    async def aput(self, text: str, dest: str, translated: str):
+        """
+        Async put(): the disk write runs on the shared executor.
+        """
+        if not self.enabled or translated is None:
+            return
+        key = translation_cache_key(text, dest)
+        self._memory.set(key, translated)
+        if self._conn is not None:
+            await run_blocking(self._disk_put, key, dest, translated)
+
+    def clear(self):
+        self._memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._pending_touches.clear()
+                self._conn.execute("DELETE FROM translations")
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._flush_touches()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache: flushing last_used failed: {e}")
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        disk_entries = None
+        with self._lock:
+            if self._conn is not None:
+                disk_entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path if self._conn is not None else None,
+            "memory_entries": len(self._memory),
+            "max_entries": self._memory.max_entries,
+            "disk_entries": disk_entries,
+            "disk_max_entries": self.disk_max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_errors": self.disk_errors,
+        }
+
+
+# Shared instance used by translation.py
+translation_cache = TranslationCache()
@@ -3,7 +3,7 @@ import React, { useState } from 'react';
 import axios from 'axios';
 import { useTranslation } from 'react-i18next';
 
-const ExportResults = () => {
+const ExportResults = ({ runId }) => {
   const [csvLoading, setCsvLoading] = useState(false);
   const [excelLoading, setExcelLoading] = useState(false);
   const { t } = useTranslation();
@@ -18,6 +18,7 @@ const ExportResults = () => {
     try {
       const response = await axios.get(endpoint, {
         responseType: 'blob',
+        params: { run_id: runId }, // Download this user's result, not the server's latest run
       });
 
       if (response.status === 200) {
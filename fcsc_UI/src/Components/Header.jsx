@@ -86,18 +86,45 @@ export default function Header({ isAdmin, setIsAdmin, handleProcess }) {
     }
   };
 
+  // Polls an ingestion job until it finishes, showing its progress in a toast. Resolves to true if the table was created.
+  const pollIngestionJob = async (jobId, file) => {
+    const toastId = toast.info(`${t("Ingesting")} ${file.name}...`, { autoClose: false });
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      let job;
+      try {
+        ({ data: job } = await axios.get(`http://127.0.0.1:8000/upload-jobs/${jobId}`));
+      } catch (err) {
+        toast.update(toastId, { render: `${t("Failed to create table from")} ${file.name}.`, type: "error", autoClose: 5000 });
+        return false;
+      }
+      if (job.phase === "completed") {
+        toast.update(toastId, { render: `${t("Table")} '${job.table_name}' ${t("created from")} ${file.name} (${job.rows_ingested} ${t("rows")}).`, type: "success", autoClose: 3000 });
+        return true;
+      }
+      if (job.phase === "failed" || job.phase === "skipped") {
+        toast.update(toastId, { render: `${t("Failed to create table from")} ${file.name}. ${job.message}`, type: "error", autoClose: 5000 });
+        return false;
+      }
+      toast.update(toastId, { render: `${t("Ingesting")} ${file.name}: ${job.phase}, ${job.rows_ingested} ${t("rows")} (${job.rows_per_second} ${t("rows/s")})` });
+    }
+  };
+
   const handleTableCreation = async () => {
     if (filesToUpload.length === 0) { toast.warn(t("No new files selected for table creation.")); return; }
-    let allSucceeded = true; const filesBeingUploaded = [...filesToUpload];
+    const filesBeingUploaded = [...filesToUpload];
     setUploadedFiles([]); setFilesToUpload([]);
+    // Each upload returns a job id right away; the server ingests the files concurrently and we poll them all
+    const jobs = [];
     for (const file of filesBeingUploaded) {
       const formData = new FormData(); formData.append("file", file);
       try {
         const { data } = await axios.post("http://127.0.0.1:8000/upload-csv", formData, { headers: { "Content-Type": "multipart/form-data" } });
-        toast.success(`${t("Table")} '${data?.table_name}' ${t("created from")} ${file.name}.`);
-      } catch (err) { allSucceeded = false; toast.error(`${t("Failed to create table from")} ${file.name}.`); }
+        jobs.push(pollIngestionJob(data.job_id, file));
+      } catch (err) { jobs.push(Promise.resolve(false)); toast.error(`${t("Failed to create table from")} ${file.name}.`); }
     }
-    if (allSucceeded) await fetchSchema();
+    const results = await Promise.all(jobs);
+    if (results.some(Boolean)) await fetchSchema();
   };
 
   const handleFileChangeEv = (e) => { if (e.target.files.length > 0) handleActualFileUpload(e.target.files); if (fileInputRef.current) fileInputRef.current.value = ""; };
@@ -22,6 +22,55 @@ const initialRoleSpecificProcessingState = {
   decomposerJson: null,
   errorMessage: "",
   hasSuccessfulResponse: false,
+  runId: null, // run_id of the /query-process run this state shows; sent with every follow-up request
+  totalRows: null, // Rows in the full result; queryResult holds only the pages loaded so far
+  truncated: false, // True if the server cut the result off at its row cap
+  loadingMoreRows: false,
+};
+
+// Rows fetched per "load more" request from /results/{run_id}
+const RESULT_PAGE_LIMIT = 500;
+
+// Reads the Server-Sent Events of /query-process-stream, forwarding progress events to onEvent,
+// and resolves with the final payload (same shape as the /query-process response).
+const streamQueryProcess = async (url, payload, onEvent) => {
+  const res = await fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  if (!res.ok || !res.body) {
+    const err = new Error(`Server responded with ${res.status}`);
+    err.response = { status: res.status };
+    throw err;
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let finalPayload = null;
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      rawEvent.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      const parsed = data ? JSON.parse(data) : null;
+      if (event === "final") finalPayload = parsed;
+      else if (event === "error") throw new Error(parsed?.error || "Stream error");
+      else onEvent(event, parsed);
+    }
+  }
+  if (!finalPayload) throw new Error("Stream ended before the final result.");
+  return finalPayload;
 };
 
 const ACCENT_BROWN_COLOR = "#8D6E63";
@@ -59,6 +108,34 @@ const MainContent = ({
     },
   });
 
+  // Appends the next page of the run's stored result; /query-process only returns the first page
+  const loadMoreRows = async () => {
+    const current = allRolesData[role];
+    if (!current?.runId || current.loadingMoreRows) return;
+    setAllRolesData((prev) => ({ ...prev, [role]: { ...prev[role], loadingMoreRows: true } }));
+    try {
+      const { data } = await axios.get(`http://127.0.0.1:8000/results/${current.runId}`, {
+        params: { offset: (current.queryResult || []).length, limit: RESULT_PAGE_LIMIT },
+      });
+      setAllRolesData((prev) => {
+        if (prev[role].runId !== current.runId) return prev; // A new query replaced this result meanwhile
+        return {
+          ...prev,
+          [role]: {
+            ...prev[role],
+            queryResult: [...(prev[role].queryResult || []), ...(data.rows || [])],
+            totalRows: data.total_rows,
+            truncated: data.truncated,
+            loadingMoreRows: false,
+          },
+        };
+      });
+    } catch (err) {
+      console.error("Error loading more rows:", err);
+      setAllRolesData((prev) => ({ ...prev, [role]: { ...prev[role], loadingMoreRows: false } }));
+    }
+  };
+
   useEffect(() => {
     setQuery(queriesByRole[role] || "");
   }, [role, queriesByRole, setQuery]);
@@ -124,15 +201,24 @@ const MainContent = ({
       }
     }
 
-    const headers = { "Content-Type": "application/json" };
     const payload = { query: query.trim() };
 
     try {
-      const response = await axios.post(
-        `http://127.0.0.1:8000/query-process/${language}`,
+      // Stream progress so the SQL and first rows show up before insights and translations finish
+      const data = await streamQueryProcess(
+        `http://127.0.0.1:8000/query-process-stream/${language}`,
         payload,
-        { headers }
+        (event, eventData) => {
+          if (event === "step") {
+            setAllRolesData((prev) => ({ ...prev, [role]: { ...prev[role], currentStep: eventData.agent } }));
+          } else if (event === "sql") {
+            setAllRolesData((prev) => ({ ...prev, [role]: { ...prev[role], sqlQuery: eventData.sql_query || "" } }));
+          } else if (event === "rows") {
+            setAllRolesData((prev) => ({ ...prev, [role]: { ...prev[role], queryResult: eventData.rows || [] } }));
+          }
+        }
       );
+      const response = { status: 200, data };
 
       if (response.status === 200) {
         const {
@@ -142,6 +228,9 @@ const MainContent = ({
           sql_query,
           suggested_visualization,
           decomposer_json,
+          run_id,
+          total_rows,
+          truncated,
           error: backendError,
         } = response.data;
 
@@ -185,6 +274,9 @@ const MainContent = ({
             sqlQuery: sql_query || "",
             suggestedVisualization: suggested_visualization || "",
             decomposerJson: decomposer_json || null,
+            runId: run_id || null,
+            totalRows: total_rows ?? (result_data || []).length,
+            truncated: !!truncated,
             loadedTabs: newTabs,
             activeTab: role === 'admin' && newTabs.length > 0 ? newTabs[0].name : prev[role].activeTab,
             errorMessage: "",
@@ -195,7 +287,8 @@ const MainContent = ({
         if (result_data && result_data.length > 0) {
           try {
             const insightsResponse = await axios.get(
-              `http://127.0.0.1:8000/summary-insights/${language}`
+              `http://127.0.0.1:8000/summary-insights/${language}`,
+              { params: { run_id } }
             );
             setAllRolesData((prev) => ({
               ...prev,
@@ -385,6 +478,32 @@ const MainContent = ({
       <div>
         {hasProcessed && (
           <div className="mt-8 px-6 md:px-8 pb-6 md:pb-8">
+            {allRolesData[role]?.hasSuccessfulResponse && allRolesData[role]?.totalRows > 0 && (
+              <div className="mb-4 flex items-center justify-between text-sm text-gray-700">
+                <span>
+                  {t("showingRows", "Showing {{shown}} of {{total}} rows", {
+                    shown: (allRolesData[role]?.queryResult || []).length,
+                    total: allRolesData[role]?.totalRows,
+                  })}
+                  {allRolesData[role]?.truncated && (
+                    <span className="ml-2" style={{ color: ACCENT_BROWN_COLOR }}>
+                      {t("resultTruncated", "(result cut off at the server's row limit)")}
+                    </span>
+                  )}
+                </span>
+                {(allRolesData[role]?.queryResult || []).length < allRolesData[role]?.totalRows && (
+                  <button
+                    onClick={loadMoreRows}
+                    disabled={allRolesData[role]?.loadingMoreRows}
+                    style={{ borderColor: ACCENT_BROWN_COLOR, color: ACCENT_BROWN_COLOR }}
+                    className="px-4 py-1.5 border-2 rounded-lg font-medium flex items-center gap-2"
+                  >
+                    {allRolesData[role]?.loadingMoreRows && <FiLoader className="animate-spin" />}
+                    {t("loadMoreRows", "Load more rows")}
+                  </button>
+                )}
+              </div>
+            )}
             <ErrorBoundary>
             <TabsContent
               adminDropdownActiveTab={selectedTab}
@@ -401,6 +520,7 @@ const MainContent = ({
               hasProcessed={hasProcessed}
               hasSuccessfulResponse={allRolesData[role]?.hasSuccessfulResponse}
               decomposerJson={allRolesData[role]?.decomposerJson}
+              runId={allRolesData[role]?.runId}
             />
             </ErrorBoundary>
           </div>
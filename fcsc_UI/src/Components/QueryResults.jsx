@@ -6,7 +6,7 @@ import axios from 'axios';
 import { useTranslation } from 'react-i18next';
 import i18n from 'i18next';
 
-const QueryResults = ({ rows, columns, data, }) => {
+const QueryResults = ({ rows, columns, data, runId }) => {
   const [selectedViz, setSelectedViz] = useState('table');
   const [isDownloading, setIsDownloading] = useState(false);
   const [insights, setInsights] = useState('');
@@ -35,7 +35,7 @@ const QueryResults = ({ rows, columns, data, }) => {
           : 'http://127.0.0.1:8000/summary-insights/english';
 
       try {
-        const res = await axios.get(insightsUrl);
+        const res = await axios.get(insightsUrl, { params: { run_id: runId } });
         if (res.status === 200 && res.data.summary_insights) {
           setInsights(res.data.summary_insights);
         } else {
@@ -50,7 +50,7 @@ const QueryResults = ({ rows, columns, data, }) => {
     };
 
     fetchInsights();
-  }, [currentLang]);
+  }, [currentLang, runId]);
 
 
 
@@ -64,6 +64,7 @@ const QueryResults = ({ rows, columns, data, }) => {
 
       const response = await axios.get(pdfUrl, {
         responseType: 'blob',
+        params: { run_id: runId },
         headers: {
           Accept: 'application/json',
         },
@@ -90,6 +90,7 @@ const TabsContent = ({
   insightsLoading,
   rows,
   columns,
+  runId,
 }) => {
   const [tabData, setTabData] = useState(null);
   const { t } = useTranslation();
@@ -118,13 +119,16 @@ const TabsContent = ({
       if (!url && !isDatabaseExecution) {
         return;
       }
+      // Agent results belong to this user's run, not to whichever query ran last on the server
+      const withRunId = (endpoint) => (runId ? `${endpoint}?run_id=${encodeURIComponent(runId)}` : endpoint);
+      if (url && adminDropdownActiveTab !== "Schema Loader") url = withRunId(url);
 
       try {
         if (isDatabaseExecution) {
           const dataInsightsUrl = language === "ar" ? "http://127.0.0.1:8000/data-insights/arabic" : "http://127.0.0.1:8000/data-insights/english";
           const [execRes, insightsRes] = await Promise.all([
-            fetch("http://127.0.0.1:8000/database-execution"),
-            fetch(dataInsightsUrl),
+            fetch(withRunId("http://127.0.0.1:8000/database-execution")),
+            fetch(withRunId(dataInsightsUrl)),
           ]);
           if (!execRes.ok || !insightsRes.ok) throw new Error("Failed to fetch DB execution or insights.");
           const execData = await execRes.json();
@@ -143,7 +147,7 @@ const TabsContent = ({
     };
 
     fetchTabDataForAdmin();
-  }, [adminDropdownActiveTab, language, hasProcessed, hasSuccessfulResponse, role]);
+  }, [adminDropdownActiveTab, language, hasProcessed, hasSuccessfulResponse, role, runId]);
   const CopyButton = ({ textToCopy }) => {
     const [copied, setCopiedState] = useState(false);
     const handleCopy = () => {
@@ -580,9 +584,10 @@ const TabsContent = ({
                         data={queryResult}
                         insights={insights}
                         insightsLoading={insightsLoading}
+                        runId={runId}
                       />
                       <div className="mt-4">
-                        <ExportResults />
+                        <ExportResults runId={runId} />
                       </div>
                     </IndentedContent>
                   </AdminSectionItem>
@@ -596,8 +601,8 @@ const TabsContent = ({
           hasSuccessfulResponse ? (
             ((queryResult && queryResult.length > 0) || insights) ? (
               <div className="mt-6 w-full bg-white p-6 rounded-lg shadow-md">
-                <QueryResults rows={rows} columns={columns} data={queryResult} insights={insights} insightsLoading={insightsLoading} />
-                <div className="mt-4"><ExportResults /></div>
+                <QueryResults rows={rows} columns={columns} data={queryResult} insights={insights} insightsLoading={insightsLoading} runId={runId} />
+                <div className="mt-4"><ExportResults runId={runId} /></div>
               </div>
             ) : (
               loadingMessage(insightsLoading ? "loadingInsights" : "noVisualizationDataAvailable")
@@ -613,8 +618,8 @@ const TabsContent = ({
           hasSuccessfulResponse ? (
             ((queryResult && queryResult.length > 0) || insights) ? (
               <div className="mt-6 w-full bg-white p-6 rounded-lg shadow-md">
-                <QueryResults rows={rows} columns={columns} data={queryResult} insights={insights} insightsLoading={insightsLoading} />
-                <div className="mt-4"><ExportResults /></div>
+                <QueryResults rows={rows} columns={columns} data={queryResult} insights={insights} insightsLoading={insightsLoading} runId={runId} />
+                <div className="mt-4"><ExportResults runId={runId} /></div>
               </div>
             ) : (
               loadingMessage(insightsLoading ? "loadingInsights" : "noVisualizationDataAvailable")